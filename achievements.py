@@ -1,26 +1,25 @@
 import sys
 import json
-import re
 from collections import defaultdict
+from sections import claim_blocks, claimed_texts, section_evidence, section_confidence
+from profiles import load_profile, profile_from_input, normalize_heading
+from limits import MEMORY_EXIT_CODE, apply_memory_limit, is_out_of_memory
 
 class AchievementsExtractor:
-    def __init__(self):
-        self.achievement_headings = {
-            'awards', 'achievements', 'award and achievements',
-            'honors', 'recognition', 'accomplishments',
-            'awards/achievements'  # Added this pattern
-        }
-        self.ignore_phrases = {
-            'skills', 'education', 'projects', 'experience',
-            'certifications', 'references'
-        }
-        self.bullet_or_numbered_pattern = re.compile(r'^(\d+\.\s+|[-•*]\s+)')
-        self.achievement_pattern = re.compile(
-            r'(1st|2nd|3rd|\d+th)\s+prize|finalist|award|honor|achievement',
-            re.IGNORECASE
-        )
+    def __init__(self, profile=None):
+        self.profile = profile or load_profile()
+        section = self.profile.sections['achievements']
+        self.achievement_headings = section.headings
+        self.ignore_phrases = section.ignore_phrases
+        self.bullet_or_numbered_pattern = section.patterns['bullet']
+        self.achievement_pattern = section.patterns['achievement']
+        self.max_lines = section.options['max_lines']  # Prevent capturing too much unrelated text
+        self.min_words = section.options['min_words']
 
     def is_achievement_heading(self, text):
+        return normalize_heading(text) in self.achievement_headings
+
+    def mentions_achievement_heading(self, text):
         text_lower = text.lower().strip(".:- ")
         return any(heading in text_lower for heading in self.achievement_headings)
 
@@ -35,15 +34,18 @@ class AchievementsExtractor:
         achievements = []
         current = []
         in_achievements_section = False
-        max_lines = 10  # Prevent capturing too much unrelated text
         
         for line in block_texts:
             line = line.strip()
             if not line:
                 continue
 
-            # Check if this line starts the achievements section
-            if not in_achievements_section and self.is_achievement_heading(line):
+            # Check if this line starts the achievements section; without an
+            # exact heading, the line that mentions one
+            if not in_achievements_section and (
+                self.is_achievement_heading(line) or
+                (self.heading_match != "exact" and self.mentions_achievement_heading(line))
+            ):
                 in_achievements_section = True
                 continue
             
@@ -65,7 +67,7 @@ class AchievementsExtractor:
             current.append(line)
             
             # Prevent collecting too much unrelated text
-            if len(current) >= max_lines:
+            if len(current) >= self.max_lines:
                 if current:
                     achievements.append({"description": " ".join(current)})
                     current = []
@@ -78,57 +80,97 @@ class AchievementsExtractor:
 
     def process_data(self, data):
         blocks = defaultdict(list)
+        heading_block_ids = []
         self.achievement_block_id = None
+        self.achievement_block_ids = []
+        line_ids = defaultdict(list)
+        self.heading_match = "none"
+        self.heading_line = None
 
-        for item in data:
+        for i, item in enumerate(data):
             block_id = item.get('block', 0)
             blocks[block_id].append(item['text'])
+            line_ids[block_id].append(i)
             if self.is_achievement_heading(item['text']):
                 self.achievement_block_id = block_id
+                self.heading_match = "exact"
+                if self.heading_line is None:
+                    self.heading_line = i
+                if block_id not in heading_block_ids:
+                    heading_block_ids.append(block_id)
 
-        # If no explicit heading found, look for block with achievement-like text
+        # Second pass: a line that mentions a heading ("Awards & Honors 2020")
         if self.achievement_block_id is None:
             for block_id, texts in blocks.items():
-                for text in texts:
+                for j, text in enumerate(texts):
+                    if self.mentions_achievement_heading(text) and not self.is_ignore_heading(text):
+                        self.achievement_block_id = block_id
+                        self.heading_match = "fallback"
+                        self.heading_line = line_ids[block_id][j]
+                        break
+                if self.achievement_block_id is not None:
+                    break
+
+        # If no heading found, look for block with achievement-like text
+        if self.achievement_block_id is None:
+            for block_id, texts in blocks.items():
+                for j, text in enumerate(texts):
                     if self.is_achievement_text(text):
                         self.achievement_block_id = block_id
+                        self.heading_match = "content"
+                        self.heading_line = line_ids[block_id][j]
                         break
                 if self.achievement_block_id is not None:
                     break
 
         if self.achievement_block_id is not None:
-            extracted = self.extract_achievement_blocks(blocks[self.achievement_block_id])
+            self.achievement_block_ids = claim_blocks(
+                blocks, heading_block_ids or [self.achievement_block_id], self.profile.section_headings
+            )
+            extracted = self.extract_achievement_blocks(claimed_texts(blocks, self.achievement_block_ids))
             # Filter out very short or non-achievement items
             filtered = [
                 item for item in extracted 
-                if (len(item['description'].split()) >= 3 and 
+                if (len(item['description'].split()) >= self.min_words and 
                     self.is_achievement_text(item['description']))
             ]
-            formatted = {}
-            for i, item in enumerate(filtered, 1):
-                formatted[f"achievement_{i}"] = item
-            return formatted
+        else:
+            filtered = []
+
+        # Bulleted or numbered items were separated by the layout, not guessed
+        structured = sum(1 for item in filtered if self.bullet_or_numbered_pattern.match(item['description']))
+        self.evidence = section_evidence(
+            data, self.heading_match, self.heading_line, heading_block_ids, self.achievement_block_ids
+        )
+        self.confidence = section_confidence(data, self.evidence, len(filtered), structured)
 
-        return {}
+        formatted = {}
+        for i, item in enumerate(filtered, 1):
+            formatted[f"achievement_{i}"] = item
+        return formatted
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python achievements.py '<json_string>'", file=sys.stderr)
+        print("Usage: python achievements.py '<json_string>' (or - to read it from stdin)", file=sys.stderr)
         sys.exit(1)
 
+    apply_memory_limit()
     try:
-        input_data = json.loads(sys.argv[1])
+        input_data = json.loads(sys.stdin.read() if sys.argv[1] == "-" else sys.argv[1])
         data = input_data['data'] if isinstance(input_data, dict) and 'data' in input_data else input_data
 
-        extractor = AchievementsExtractor()
+        profile = profile_from_input(input_data)
+        extractor = AchievementsExtractor(profile)
         achievements = extractor.process_data(data)
 
         result = {
             "achievements": achievements,
-            "used_block": extractor.achievement_block_id
+            "used_blocks": extractor.achievement_block_ids,
+            "confidence": extractor.confidence,
+            "evidence": extractor.evidence
         }
         print(json.dumps(result))
 
     except Exception as e:
         print(f"Error processing achievements: {str(e)}", file=sys.stderr)
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(MEMORY_EXIT_CODE if is_out_of_memory(e) else 1)
\ No newline at end of file
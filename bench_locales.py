@@ -0,0 +1,86 @@
+"""Benchmark: what the locale layer costs on English documents.
+
+Runs every PDF in a directory through extraction and the section extractors
+three ways and reports the median time per document for each:
+
+    no-locales   the profile with its "locales" list emptied (English only)
+    detect       the normal path: detection runs, nothing is detected for an
+                 English document, so the English matchers are used
+    all-locales  every locale of the profile forced on (worst case for
+                 multilingual documents: the largest merged matchers)
+
+    python bench_locales.py corpus/
+    python bench_locales.py corpus/ --max-slowdown 10   # exit 1 if detect is >10% slower
+"""
+import os
+import sys
+import time
+import argparse
+from statistics import median
+
+from extract import extract_pdf_layout
+from profiles import ExtractionProfile, load_profile
+from regression import SECTION_EXTRACTORS
+
+def run_document(pdf_path, profile, force_locales=None):
+    # A forced profile is localized before extraction, so the layout pass
+    # matches with it too; detection leaves an already-localized profile as is
+    if force_locales is not None:
+        profile = profile.localized(force_locales)
+    data, _, _, detected = extract_pdf_layout(pdf_path, profile=profile)
+    for extractor_cls in SECTION_EXTRACTORS.values():
+        extractor_cls(profile=detected).process_data(data)
+    return detected.locales
+
+def bench(pdfs, variants, repeat):
+    timings = {name: [] for name in variants}
+    locales = {}
+    for pdf_path in pdfs:
+        for name, (profile, force_locales) in variants.items():
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                locales[pdf_path, name] = run_document(pdf_path, profile, force_locales)
+                runs.append(time.perf_counter() - start)
+            timings[name].append(median(runs))
+    return timings, locales
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Locale matcher benchmark")
+    parser.add_argument("corpus_dir", help="directory of PDFs (English documents show the overhead)")
+    parser.add_argument("--profile", default=None, help="extraction profile to benchmark")
+    parser.add_argument("--repeat", type=int, default=10, help="timing runs per document (median is kept)")
+    parser.add_argument("--max-slowdown", type=float, default=None,
+                        help="fail when detect is more than this many percent slower than no-locales")
+    args = parser.parse_args()
+
+    pdfs = sorted(os.path.join(args.corpus_dir, f) for f in os.listdir(args.corpus_dir)
+                  if f.lower().endswith(".pdf"))
+    if not pdfs:
+        print(f"no PDFs in {args.corpus_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    profile = load_profile(args.profile)
+    english_only = ExtractionProfile(profile.name, dict(profile.config, locales=[]))
+    variants = {
+        "no-locales": (english_only, None),
+        "detect": (profile, None),
+        "all-locales": (profile, profile.available_locales),
+    }
+    # Warm-up compiles every matcher so the timings compare matching, not loading
+    bench(pdfs, variants, 1)
+    timings, locales = bench(pdfs, variants, max(1, args.repeat))
+
+    print(f"{'document':<28}" + "".join(f"{name:>14}" for name in variants) + "  detected")
+    for i, pdf_path in enumerate(pdfs):
+        row = "".join(f"{timings[name][i] * 1000:>12.2f}ms" for name in variants)
+        print(f"{os.path.basename(pdf_path):<28}{row}  {','.join(locales[pdf_path, 'detect']) or '-'}")
+
+    totals = {name: sum(values) for name, values in timings.items()}
+    print(f"{'total':<28}" + "".join(f"{totals[name] * 1000:>12.2f}ms" for name in variants))
+    slowdown = (totals["detect"] / totals["no-locales"] - 1) * 100
+    print(f"detect vs no-locales: {slowdown:+.1f}%")
+
+    if args.max_slowdown is not None and slowdown > args.max_slowdown:
+        print(f"FAIL locale detection slows the English path by {slowdown:.1f}%")
+        sys.exit(1)
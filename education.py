@@ -1,29 +1,20 @@
 import sys
 import json
-import re
 from collections import defaultdict
+from sections import claim_blocks, claimed_texts, section_evidence, section_confidence
+from profiles import load_profile, profile_from_input
+from limits import MEMORY_EXIT_CODE, apply_memory_limit, is_out_of_memory
 
 class EducationExtractor:
-    def __init__(self):
-        self.education_headings = {
-            'education', 'academic background', 'academics', 'educational background',
-            'education & training', 'qualifications'
-        }
-        self.ignore_phrases = {
-            'skills', 'experience', 'hobbies', 'projects',
-            'certifications', 'references'
-        }
-        self.date_pattern = re.compile(
-            r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*'
-            r'(?:\s+\d{1,2})?(?:\s*[-–—]\s*(?:present|now|current|'
-            r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*'
-            r'(?:\s+\d{1,2})?|\d{4}))?\s*\d{4}\b|\b\d{4}\s*[-–—]\s*\d{4}\b',
-            re.IGNORECASE
-        )
-        self.degree_pattern = re.compile(
-            r'\b(?:b\.?tech|m\.?tech|ph\.?d|mba|bsc|msc|ba|ma|b\.?e|m\.?e|bca|mca|diploma|degree|graduate)\b',
-            re.IGNORECASE
-        )
+    def __init__(self, profile=None):
+        self.profile = profile or load_profile()
+        section = self.profile.sections['education']
+        self.education_headings = section.headings
+        self.ignore_phrases = section.ignore_phrases
+        self.fallback_keywords = section.fallback_keywords
+        self.date_pattern = section.patterns['date']
+        self.degree_pattern = section.patterns['degree']
+        self.entry_keywords = section.options['entry_keywords']
 
     def is_education_heading(self, text):
         text_lower = text.lower().strip(".:- ")
@@ -39,7 +30,6 @@ class EducationExtractor:
     def extract_education_blocks(self, block_texts):
         education_entries = []
         current_entry = {}
-        keywords = ['grade', 'completion', 'graduation', 'cgpa', 'percentage', 'class', 'marks']
 
         for line in block_texts:
             line = line.strip()
@@ -48,7 +38,7 @@ class EducationExtractor:
 
             is_start = (
                 self.degree_pattern.search(line) or
-                any(k in line.lower() for k in keywords) or
+                any(k in line.lower() for k in self.entry_keywords) or
                 self.is_date(line)
             )
 
@@ -68,52 +58,83 @@ class EducationExtractor:
 
     def process_data(self, data):
         blocks = defaultdict(list)
+        heading_block_ids = []
         self.education_block_id = None
+        self.education_block_ids = []
+        line_ids = defaultdict(list)
+        self.heading_match = "none"
+        self.heading_line = None
 
-        for item in data:
+        for i, item in enumerate(data):
             block_id = item.get('block', 0)
             blocks[block_id].append(item['text'])
+            line_ids[block_id].append(i)
             if self.is_education_heading(item['text']):
                 self.education_block_id = block_id
+                self.heading_match = "exact"
+                if self.heading_line is None:
+                    self.heading_line = i
+                if block_id not in heading_block_ids:
+                    heading_block_ids.append(block_id)
 
         if self.education_block_id is None:
             for block_id, texts in blocks.items():
-                for text in texts:
+                for j, text in enumerate(texts):
                     text_lower = text.lower()
-                    if 'education' in text_lower and not any(ignore in text_lower for ignore in self.ignore_phrases):
+                    if any(keyword in text_lower for keyword in self.fallback_keywords) and not any(ignore in text_lower for ignore in self.ignore_phrases):
                         self.education_block_id = block_id
+                        self.heading_match = "fallback"
+                        self.heading_line = line_ids[block_id][j]
                         break
                 if self.education_block_id is not None:
                     break
 
         if self.education_block_id is not None:
-            educations = self.extract_education_blocks(blocks[self.education_block_id])
-            
-            formatted_educations = {}
-            for i, edu in enumerate(educations, 1):
-                formatted_educations[f"education_{i}"] = edu
+            self.education_block_ids = claim_blocks(
+                blocks, heading_block_ids or [self.education_block_id], self.profile.section_headings
+            )
+            educations = self.extract_education_blocks(claimed_texts(blocks, self.education_block_ids))
+        else:
+            educations = []
+
+        # An entry with a degree or a date parsed as education, not just text
+        structured = sum(
+            1 for edu in educations
+            if any(self.degree_pattern.search(line) or self.is_date(line) for line in edu['details'])
+        )
+        self.evidence = section_evidence(
+            data, self.heading_match, self.heading_line, heading_block_ids, self.education_block_ids
+        )
+        self.confidence = section_confidence(data, self.evidence, len(educations), structured)
 
-            return formatted_educations
-        return {}
+        formatted_educations = {}
+        for i, edu in enumerate(educations, 1):
+            formatted_educations[f"education_{i}"] = edu
+
+        return formatted_educations
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python education.py '<json_string>'", file=sys.stderr)
+        print("Usage: python education.py '<json_string>' (or - to read it from stdin)", file=sys.stderr)
         sys.exit(1)
 
+    apply_memory_limit()
     try:
-        input_data = json.loads(sys.argv[1])
+        input_data = json.loads(sys.stdin.read() if sys.argv[1] == "-" else sys.argv[1])
         data = input_data['data'] if isinstance(input_data, dict) and 'data' in input_data else input_data
 
-        extractor = EducationExtractor()
+        profile = profile_from_input(input_data)
+        extractor = EducationExtractor(profile)
         educations = extractor.process_data(data)
 
         result = {
         "education": educations,
-        "used_block": extractor.education_block_id  # This is an integer or None
+        "used_blocks": extractor.education_block_ids,
+        "confidence": extractor.confidence,
+        "evidence": extractor.evidence
         }
         print(json.dumps(result))
 
     except Exception as e:
         print(f"Error processing education: {str(e)}", file=sys.stderr)
-        sys.exit(1)
+        sys.exit(MEMORY_EXIT_CODE if is_out_of_memory(e) else 1)
@@ -1,31 +1,19 @@
 import sys
 import json
-import re
 from collections import defaultdict
+from sections import claim_blocks, claimed_texts, section_evidence, section_confidence
+from profiles import load_profile, profile_from_input
+from limits import MEMORY_EXIT_CODE, apply_memory_limit, is_out_of_memory
 
 class ExperienceExtractor:
-    def __init__(self):
-        self.experience_headings = {
-            'experience', 'work experience', 'professional experience',
-            'employment history', 'career history', 'employment',
-            'professional background'
-        }
-        self.ignore_phrases = {
-            'skills', 'education', 'hobbies', 'projects',
-            'certifications', 'references'
-        }
-        self.date_pattern = re.compile(
-            r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*'
-            r'(?:\s+\d{1,2})?(?:\s*[-–—]\s*(?:present|now|current|'
-            r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*'
-            r'(?:\s+\d{1,2})?|\d{4}))?\s*\d{4}\b|\b\d{4}\s*[-–—]\s*\d{4}\b',
-            re.IGNORECASE
-        )
-        self.position_pattern = re.compile(
-            r'^(.*?\b(?:engineer|developer|manager|director|specialist|'
-            r'analyst|designer|consultant|associate|officer|lead|head)\b.*?)$',
-            re.IGNORECASE
-        )
+    def __init__(self, profile=None):
+        self.profile = profile or load_profile()
+        section = self.profile.sections['experience']
+        self.experience_headings = section.headings
+        self.ignore_phrases = section.ignore_phrases
+        self.fallback_keywords = section.fallback_keywords
+        self.date_pattern = section.patterns['date']
+        self.position_pattern = section.patterns['position']
 
     def is_experience_heading(self, text):
         text_lower = text.lower().strip(".:- ")
@@ -80,58 +68,86 @@ class ExperienceExtractor:
 
     def process_data(self, data):
         blocks = defaultdict(list)
+        heading_block_ids = []
         self.experience_block_id = None
+        self.experience_block_ids = []
+        line_ids = defaultdict(list)
+        self.heading_match = "none"
+        self.heading_line = None
         
         # First pass: find all blocks and identify the experience block
-        for item in data:
+        for i, item in enumerate(data):
             block_id = item.get('block', 0)
             blocks[block_id].append(item['text'])
+            line_ids[block_id].append(i)
             if self.is_experience_heading(item['text']):
                 self.experience_block_id = block_id
+                self.heading_match = "exact"
+                if self.heading_line is None:
+                    self.heading_line = i
+                if block_id not in heading_block_ids:
+                    heading_block_ids.append(block_id)
 
         # Second pass: if no exact match, look for partial matches
         if self.experience_block_id is None:
             for block_id, texts in blocks.items():
-                for text in texts:
+                for j, text in enumerate(texts):
                     text_lower = text.lower()
-                    if ('experience' in text_lower or 'employment' in text_lower) and \
+                    if any(keyword in text_lower for keyword in self.fallback_keywords) and \
                        not any(ignore in text_lower for ignore in self.ignore_phrases):
                         self.experience_block_id = block_id
+                        self.heading_match = "fallback"
+                        self.heading_line = line_ids[block_id][j]
                         break
                 if self.experience_block_id is not None:
                     break
 
         # If we found an experience block, extract its contents
         if self.experience_block_id is not None:
-            experiences = self.extract_experience_blocks(blocks[self.experience_block_id])
+            self.experience_block_ids = claim_blocks(
+                blocks, heading_block_ids or [self.experience_block_id], self.profile.section_headings
+            )
+            experiences = self.extract_experience_blocks(claimed_texts(blocks, self.experience_block_ids))
+        else:
+            experiences = []
+
+        # Entries anchored on a date range or a position line are structured
+        structured = sum(1 for exp in experiences if 'dates' in exp or 'position' in exp)
+        self.evidence = section_evidence(
+            data, self.heading_match, self.heading_line, heading_block_ids, self.experience_block_ids
+        )
+        self.confidence = section_confidence(data, self.evidence, len(experiences), structured)
             
-            # Format the experiences with sequential numbers
-            formatted_experiences = {}
-            for i, exp in enumerate(experiences, 1):
-                formatted_experiences[f"experience_{i}"] = exp
+        # Format the experiences with sequential numbers
+        formatted_experiences = {}
+        for i, exp in enumerate(experiences, 1):
+            formatted_experiences[f"experience_{i}"] = exp
             
-            return formatted_experiences
-        return {}
+        return formatted_experiences
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python experience.py '<json_string>'", file=sys.stderr)
+        print("Usage: python experience.py '<json_string>' (or - to read it from stdin)", file=sys.stderr)
         sys.exit(1)
 
+    apply_memory_limit()
     try:
-        input_data = json.loads(sys.argv[1])
+        input_data = json.loads(sys.stdin.read() if sys.argv[1] == "-" else sys.argv[1])
         data = input_data['data'] if isinstance(input_data, dict) and 'data' in input_data else input_data
 
-        extractor = ExperienceExtractor()
+        profile = profile_from_input(input_data)
+        extractor = ExperienceExtractor(profile)
         experiences = extractor.process_data(data)
 
         # Output a valid JSON object of experiences
         result = {
         "experience": experiences,
-        "used_block": extractor.experience_block_id  # This is an integer or None
+        "used_blocks": extractor.experience_block_ids,
+        "confidence": extractor.confidence,
+        "evidence": extractor.evidence
         }
         print(json.dumps(result))
 
     except Exception as e:
         print(f"Error processing experiences: {str(e)}", file=sys.stderr)
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(MEMORY_EXIT_CODE if is_out_of_memory(e) else 1)
\ No newline at end of file
@@ -1,6 +1,7 @@
 import sys
 import json
 from collections import defaultdict
+from limits import MEMORY_EXIT_CODE, apply_memory_limit, is_out_of_memory
 
 COMMON_HEADINGS = {
     'skills', 'education', 'experience', 'projects',
@@ -11,7 +12,10 @@ COMMON_HEADINGS = {
 
 USED_BLOCKS = set()
 
-def get_other_info(data):
+def get_other_info(data, used_blocks=None):
+    """Lines of every block no section extractor claimed; used_blocks
+    defaults to the module-level USED_BLOCKS the CLI fills in"""
+    used_blocks = USED_BLOCKS if used_blocks is None else used_blocks
     blocks = defaultdict(list)
     for item in data:
         block_id = item.get("block", 0)
@@ -19,7 +23,7 @@ def get_other_info(data):
 
     other_info = {}
     for block_id, items in blocks.items():
-        if block_id in USED_BLOCKS:
+        if block_id in used_blocks:
             continue
 
         clean_raw = []
@@ -39,18 +43,20 @@ def get_other_info(data):
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
-        print("Usage: python extra.py '<extracted_data_json>' '<used_blocks_json>'", file=sys.stderr)
+        print("Usage: python extra.py '<extracted_data_json>' '<used_blocks_json>'"
+              " (- as the first argument reads the data from stdin)", file=sys.stderr)
         sys.exit(1)
 
+    apply_memory_limit()
     try:
-        input_data = json.loads(sys.argv[1])
+        input_data = json.loads(sys.stdin.read() if sys.argv[1] == "-" else sys.argv[1])
         used_blocks = json.loads(sys.argv[2])
         USED_BLOCKS.update(used_blocks)
 
         data = input_data["data"] if isinstance(input_data, dict) and "data" in input_data else input_data
         result = get_other_info(data)
-        print(json.dumps(result, indent=2))
+        print(json.dumps(result, ensure_ascii=False, separators=(",", ":")))
 
     except Exception as e:
         print(f"Error in extra.py: {str(e)}", file=sys.stderr)
-        sys.exit(1)
+        sys.exit(MEMORY_EXIT_CODE if is_out_of_memory(e) else 1)
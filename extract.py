@@ -1,131 +1,48 @@
 import sys
-import json
-import fitz  # PyMuPDF
+import argparse
 from collections import defaultdict
-import re
-
-HEADING_KEYWORDS = {
-    "profile", "skills", "education", "experience", "employment history",
-    "projects", "certifications", "languages", "details", "hobbies", 
-    "extra-curricular activities", "summary", "work experience",
-    "technical skills", "professional experience", "academic background", 
-    "awards", "achievements", "contact", "references", "publications", "award and achievementser","employment","jobs"
-}
-
-DATE_PATTERNS = [
-    r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{4}\b',
-    r'\b\d{4}\b',
-    r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{4} – (?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{4}\b',
-    r'\b\d{4} – \d{4}\b',
-    r'\bPresent\b'
-]
-
-def contains_date(text):
-    text = text.replace('-', '–')
-    for pattern in DATE_PATTERNS:
-        if re.search(pattern, text, re.IGNORECASE):
-            return True
-    return False
-
-def calculate_heading_score(line, size_levels):
-    text = line["text"].strip().lower()
-    score = 0
-    
-    if line["font_size"] >= size_levels[0] - 1:
-        score += 3
-    elif line["font_size"] >= size_levels[1] - 1:
-        score += 2
-    elif line["font_size"] >= size_levels[2] - 1:
-        score += 1
-
-    clean_text = text.strip(":.- ").lower()
-    if clean_text in HEADING_KEYWORDS:
-        score += 2
-
-    if text.isupper():
-        score += 1
-    if text.endswith(":") or text.endswith("-"):
-        score += 1
-
-    if line["y0"] < 150:
-        score += 1
-
-    if len(text.split()) <= 5:
-        score += 1
-
-    if len(text.split()) <= 1 and line["font_size"] > size_levels[0] - 1:
-        score -= 1  # new: penalize short large-font lines
-
-    return score
-
-def detect_columns(lines, page_width):
-    if not lines:
-        return [0, page_width]
-
-    x_coords = []
-    for line in lines:
-        x_coords.append(line["x0"])
-        x_coords.append(line["x1"])
-    x_coords = sorted(x_coords)
-
-    gaps = []
-    for i in range(1, len(x_coords)):
-        gaps.append(x_coords[i] - x_coords[i-1])
-
-    if not gaps:
-        return [0, page_width]
-
-    avg_gap = sum(gaps) / len(gaps)
-    std_gap = (sum((g - avg_gap)**2 for g in gaps) / len(gaps))**0.5
-    significant_gaps = [g for g in gaps if g > avg_gap + std_gap]
-
-    if not significant_gaps:
-        return [0, page_width]
-
-    gap_counts = defaultdict(int)
-    for gap in gaps:
-        if gap in significant_gaps:
-            gap_counts[round(gap, 1)] += 1
-
-    if not gap_counts:
-        return [0, page_width]
-
-    column_gap = max(gap_counts.items(), key=lambda x: x[1])[0]
-
-    split_positions = [0]
-    for i in range(1, len(x_coords)):
-        if round(x_coords[i] - x_coords[i-1], 1) == column_gap:
-            split_pos = (x_coords[i-1] + x_coords[i]) / 2
-            split_positions.append(split_pos)
-    split_positions.append(page_width)
-
-    min_column_width = page_width * 0.2
-    final_positions = [split_positions[0]]
-    for pos in split_positions[1:-1]:
-        if pos - final_positions[-1] >= min_column_width:
-            final_positions.append(pos)
-    final_positions.append(split_positions[-1])
-
-    if len(final_positions) < 2:
-        final_positions = [0, page_width]  # new: force single-column fallback
-
-    return final_positions
-
-def extract_pdf_layout(pdf_path):
-    doc = fitz.open(pdf_path)
-    extracted_data = []
-    page_heights = []
-    page_widths = []
-
-    for page_num in range(len(doc)):
+from heading_model import build_style_profile, score_headings
+from reading_order import order_page_lines
+from output import OUTPUT_PROFILES, OUTPUT_FORMATS, select_fields, write_output
+from profiles import load_profile
+from pdf_source import FITZ_LOCK, open_pdf
+from line_record import LineRecord, FontTable
+from limits import MEMORY_EXIT_CODE, apply_memory_limit, is_out_of_memory
+
+def contains_date(text, date_pattern):
+    return bool(date_pattern.search(text.replace('-', '–')))
+
+OCR_DPI = 150  # enough for body text; higher DPI costs render and OCR time
+OCR_LANGUAGE = "eng"
+
+def iter_page_lines(doc, max_pages=None, ocr=False, ocr_dpi=OCR_DPI, ocr_language=OCR_LANGUAGE, font_table=None):
+    """Yield (page_num, page_width, page_height, lines) one page at a time.
+
+    The page object and its text dict are dropped before the next page is
+    loaded, so only the compact LineRecords outlive each iteration; their
+    font tuples come from font_table, shared across the document. With
+    ocr=True the text comes from Tesseract through PyMuPDF's OCR text page
+    instead of the PDF text layer.
+    """
+    if font_table is None:
+        font_table = FontTable()
+    page_count = len(doc)
+    if max_pages is not None:
+        page_count = min(page_count, max_pages)
+
+    for page_num in range(page_count):
         page = doc.load_page(page_num)
         page_height = page.rect.height
         page_width = page.rect.width
-        page_heights.append(page_height)
-        page_widths.append(page_width)
-
-        blocks = page.get_text("dict")["blocks"]
+        if ocr:
+            textpage = page.get_textpage_ocr(dpi=ocr_dpi, full=True, language=ocr_language)
+            blocks = page.get_text("dict", textpage=textpage)["blocks"]
+            del textpage
+        else:
+            blocks = page.get_text("dict")["blocks"]
+        del page
 
+        lines = []
         for block in blocks:
             if block["type"] != 0:
                 continue
@@ -151,58 +68,76 @@ def extract_pdf_layout(pdf_path):
 
                 x0, y0, x1, y1 = min(x0s), min(y0s), max(x1s), max(y1s)
                 font_size = max(font_sizes)
-                fonts = list(fonts)
-
-                extracted_data.append({
-                    "text": line_text.strip(),
-                    "x0": x0,
-                    "y0": y0,
-                    "x1": x1,
-                    "y1": y1,
-                    "font_size": font_size,
-                    "fonts": fonts,
-                    "page": page_num,
-                    "block": 0,
-                    "heading_score": 0,
-                    "column": 0,
-                    "contains_date": contains_date(line_text.strip())
-                })
-
-    actual_page_height = page_heights[0] if page_heights else 1000
-    actual_page_width = page_widths[0] if page_widths else 600
-
-    page_columns = {}
-    for page_num in set([d["page"] for d in extracted_data]):
-        page_lines = [d for d in extracted_data if d["page"] == page_num]
-        columns = detect_columns(page_lines, actual_page_width)
-        page_columns[page_num] = columns
-
-    for item in extracted_data:
-        columns = page_columns[item["page"]]
-        for i in range(1, len(columns)):
-            if item["x0"] < columns[i]:
-                item["column"] = i - 1
+                if ocr:
+                    # OCR has no real font sizes; estimate from the line height and
+                    # round so lines of the same style land on the same size level
+                    font_size = float(round((y1 - y0) / 1.2))
+
+                lines.append(LineRecord(
+                    line_text.strip(), x0, y0, x1, y1, font_size, font_table.intern(fonts), page_num
+                ))
+        del blocks
+
+        yield page_num, page_width, page_height, lines
+
+def extract_pdf_layout(pdf_path, max_pages=None, max_lines=None, ocr=False, ocr_dpi=OCR_DPI, profile=None):
+    """Return (lines, first_page_height, truncated, profile); lines are
+    LineRecords (line_record.py), readable like the dicts they replace.
+
+    pdf_path may also be the PDF's bytes. Only reading the document holds
+    FITZ_LOCK; scoring and block detection run unlocked.
+    Pages are streamed through iter_page_lines and each page is put in
+    reading order (XY-cut regions, see reading_order.py). Heading scores
+    come from heading_model, using a style profile built once for the whole
+    document. When max_pages or max_lines cuts the document short, truncated
+    describes where it stopped, otherwise it is None. Keywords, date
+    patterns and block thresholds come from the extraction profile
+    (profiles.py); None selects the default one. The returned profile is
+    that profile localized to the languages detected in the first lines.
+    """
+    profile = profile or load_profile()
+    extracted_data = []
+    font_table = FontTable()
+    page_heights = {}
+    truncated = None
+    actual_page_height = 1000
+
+    with FITZ_LOCK, open_pdf(pdf_path) as doc:
+        total_pages = len(doc)
+
+        for page_num, page_width, page_height, page_lines in iter_page_lines(
+                doc, max_pages, ocr, ocr_dpi, font_table=font_table):
+            if page_num == 0:
+                actual_page_height = page_height
+            page_heights[page_num] = page_height
+
+            if max_lines is not None and len(extracted_data) + len(page_lines) > max_lines:
+                page_lines = page_lines[:max_lines - len(extracted_data)]
+                truncated = {"reason": "max_lines", "pages": page_num + 1, "total_pages": total_pages}
+
+            extracted_data.extend(order_page_lines(page_lines, page_width))
+            if truncated:
                 break
 
-    font_sizes = [item["font_size"] for item in extracted_data]
-    if not font_sizes:
-        return extracted_data, actual_page_height
+        if truncated is None and max_pages is not None and total_pages > max_pages:
+            truncated = {"reason": "max_pages", "pages": max_pages, "total_pages": total_pages}
 
-    unique_sizes = sorted(list(set(font_sizes)), reverse=True)
+    if truncated is not None:
+        truncated["lines"] = len(extracted_data)
 
-    if len(unique_sizes) >= 3:
-        size_levels = [unique_sizes[0], unique_sizes[1], unique_sizes[-1]]
-    elif len(unique_sizes) == 2:
-        size_levels = [unique_sizes[0], unique_sizes[1], unique_sizes[1]-2]
-    else:
-        size_levels = [unique_sizes[0], unique_sizes[0]-2, unique_sizes[0]-4]
+    if not extracted_data:
+        return extracted_data, actual_page_height, truncated, profile
 
+    profile = profile.localized(profile.detect_locales([item.text for item in extracted_data]))
     for item in extracted_data:
-        item["heading_score"] = calculate_heading_score(item, size_levels)
+        item.contains_date = contains_date(item.text, profile.date_pattern)
 
-    extracted_data.sort(key=lambda x: (x["page"], x["column"], x["y0"], x["x0"]))
+    style = build_style_profile(extracted_data)
+    scores = score_headings(extracted_data, style, profile.heading_keywords, page_heights)
+    for item, score in zip(extracted_data, scores.tolist()):
+        item.heading_score = round(score, 2)
 
-    max_score = max(item["heading_score"] for item in extracted_data) if extracted_data else 0
+    max_score = max(item.heading_score for item in extracted_data) if extracted_data else 0
 
     def count_blocks(threshold):
         blocks = 1
@@ -210,62 +145,62 @@ def extract_pdf_layout(pdf_path):
             curr = extracted_data[i]
             prev = extracted_data[i-1]
 
-            if prev["heading_score"] == max_score:
+            if prev.heading_score == max_score:
                 continue
 
-            if (curr["heading_score"] >= threshold and 
-                (curr["y0"] - prev["y1"] > 3 or  # changed from 10 → 3
-                 abs(curr["font_size"] - prev["font_size"]) > 1 or
-                 curr["column"] != prev["column"])):
+            if (curr.heading_score >= threshold and 
+                (curr.y0 - prev.y1 > profile.block_gap or
+                 abs(curr.font_size - prev.font_size) > profile.font_size_change or
+                 curr.region != prev.region)):
                 blocks += 1
         return blocks
 
-    low, high = 1.0, 5.0
-    best_threshold = 3.0
-    best_block_count = count_blocks(3.0)
+    low, high = profile.threshold_range
+    best_threshold = profile.default_threshold
+    best_block_count = count_blocks(best_threshold)
 
     for _ in range(10):
         mid = (low + high) / 2
         block_count = count_blocks(mid)
 
-        if 3 <= block_count <= 10:
+        if profile.min_blocks <= block_count <= profile.max_blocks:
             best_threshold = mid
             best_block_count = block_count
             break
-        elif block_count < 3:
+        elif block_count < profile.min_blocks:
             high = mid - 0.1
         else:
             low = mid + 0.1
 
     current_block = 1
-    extracted_data[0]["block"] = current_block
-    block_headings = {1: extracted_data[0]["text"]}
+    extracted_data[0].block = current_block
+    block_headings = {1: extracted_data[0].text}
 
     for i in range(1, len(extracted_data)):
         curr = extracted_data[i]
         prev = extracted_data[i-1]
 
-        if prev["heading_score"] == max_score:
-            curr["block"] = current_block
+        if prev.heading_score == max_score:
+            curr.block = current_block
             continue
 
-        if (curr["heading_score"] >= best_threshold and 
-            (curr["y0"] - prev["y1"] > 3 or  # changed from 10 → 3
-             abs(curr["font_size"] - prev["font_size"]) > 1 or
-             curr["column"] != prev["column"])):
+        if (curr.heading_score >= best_threshold and 
+            (curr.y0 - prev.y1 > profile.block_gap or
+             abs(curr.font_size - prev.font_size) > profile.font_size_change or
+             curr.region != prev.region)):
             current_block += 1
-            block_headings[current_block] = curr["text"]
+            block_headings[current_block] = curr.text
 
-        curr["block"] = current_block
+        curr.block = current_block
 
-    while current_block > 10:
+    while current_block > profile.max_blocks:
         min_size = float('inf')
         merge_pos = -1
 
         block_sizes = defaultdict(int)
         for item in extracted_data:
-            if item["heading_score"] != max_score:
-                block_sizes[item["block"]] += 1
+            if item.heading_score != max_score:
+                block_sizes[item.block] += 1
 
         for block in range(1, current_block):
             combined_size = block_sizes.get(block, 0) + block_sizes.get(block+1, 0)
@@ -274,48 +209,80 @@ def extract_pdf_layout(pdf_path):
                 merge_pos = block
 
         for item in extracted_data:
-            if item["block"] > merge_pos:
-                item["block"] -= 1
+            if item.block > merge_pos:
+                item.block -= 1
         current_block -= 1
 
-    while current_block < 3 and current_block > 1:
+    while current_block < profile.min_blocks and current_block > 1:
         block_sizes = defaultdict(int)
         for item in extracted_data:
-            if item["heading_score"] != max_score:
-                block_sizes[item["block"]] += 1
+            if item.heading_score != max_score:
+                block_sizes[item.block] += 1
 
         max_block = max(block_sizes.items(), key=lambda x: x[1])[0] if block_sizes else 1
         split_pos = -1
 
         for i in range(1, len(extracted_data)):
-            if extracted_data[i]["block"] == max_block:
-                if (extracted_data[i]["heading_score"] >= 2 and 
-                    i > 0 and extracted_data[i-1]["block"] == max_block):
+            if extracted_data[i].block == max_block:
+                if (extracted_data[i].heading_score >= profile.split_heading_score and 
+                    i > 0 and extracted_data[i-1].block == max_block):
                     split_pos = i
                     break
 
-        if split_pos != -1:
-            for i in range(split_pos, len(extracted_data)):
-                if extracted_data[i]["block"] == max_block:
-                    extracted_data[i]["block"] += 1
-                else:
-                    break
-            current_block += 1
+        # Nothing left to split: stop with fewer blocks instead of looping forever
+        if split_pos == -1:
+            break
+
+        for i in range(split_pos, len(extracted_data)):
+            if extracted_data[i].block == max_block:
+                extracted_data[i].block += 1
+            else:
+                break
+        current_block += 1
 
-    return extracted_data, actual_page_height
+    return extracted_data, actual_page_height, truncated, profile
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python extract.py <pdf_path>", file=sys.stderr)
+    parser = argparse.ArgumentParser(description="Extract line layout from a PDF")
+    parser.add_argument("pdf_path", help="PDF file, or - to read the PDF from stdin")
+    parser.add_argument("--output", choices=OUTPUT_PROFILES, default="compact",
+                        help="compact: fields used downstream; debug: adds scoring/region internals")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json")
+    parser.add_argument("--max-pages", type=int, default=None,
+                        help="stop reading after this many pages")
+    parser.add_argument("--max-lines", type=int, default=None,
+                        help="stop reading after this many text lines")
+    parser.add_argument("--ocr", action="store_true",
+                        help="read text with Tesseract OCR instead of the PDF text layer")
+    parser.add_argument("--ocr-dpi", type=int, default=OCR_DPI)
+    parser.add_argument("--profile", default=None,
+                        help="extraction profile name (profiles/<name>.json)")
+    args = parser.parse_args()
+
+    apply_memory_limit()
+    try:
+        profile = load_profile(args.profile)
+    except ValueError as e:
+        print(f"Extraction failed: {e}", file=sys.stderr)
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
-    data, page_height = extract_pdf_layout(pdf_path)
-    print(json.dumps({
+    source = sys.stdin.buffer.read() if args.pdf_path == "-" else args.pdf_path
+    try:
+        data, page_height, truncated, profile = extract_pdf_layout(
+            source, args.max_pages, args.max_lines, args.ocr, args.ocr_dpi, profile
+        )
+    except RuntimeError as e:
+        # PyMuPDF raises RuntimeError when Tesseract or its language data is
+        # missing, and when an allocation fails under the memory limit
+        print(f"Extraction failed: {e}", file=sys.stderr)
+        sys.exit(MEMORY_EXIT_CODE if is_out_of_memory(e) else 1)
+    # The section extractors load the same profile and locales from this output
+    result = {
         "page_height": page_height,
-        "data": data
-    }, ensure_ascii=False, indent=2))
-
-
-
-
+        "profile": profile.name,
+        "locales": list(profile.locales),
+        "data": select_fields(data, args.output)
+    }
+    if truncated:
+        result["truncated"] = truncated
+    write_output(result, args.format)
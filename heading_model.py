@@ -0,0 +1,103 @@
+import os
+import json
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+
+WEIGHTS_PATH = os.environ.get(
+    "HEADING_WEIGHTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "heading_weights.json")
+)
+
+# Column order of the feature matrix; weights are looked up by these names
+FEATURES = (
+    "size_level", "keyword", "upper", "trailing_mark", "top_of_page",
+    "short", "short_large", "bold", "gap_above"
+)
+
+BOLD_MARKERS = ("bold", "black", "heavy", "semibold")
+
+@lru_cache(maxsize=None)
+def load_heading_config(path=WEIGHTS_PATH):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    weights = np.array([config["weights"].get(name, 0.0) for name in FEATURES], dtype=float)
+    return weights, config.get("top_of_page_fraction", 0.18), config.get("gap_above_factor", 1.5)
+
+def is_bold(font):
+    font = font.lower()
+    return any(marker in font for marker in BOLD_MARKERS)
+
+def line_gaps(lines):
+    """Vertical gap between each line and the previous one in reading order,
+    when both are in the same page and region (0 otherwise)"""
+    page = np.fromiter((line["page"] for line in lines), int, len(lines))
+    region = np.fromiter((line["region"] for line in lines), int, len(lines))
+    y0 = np.fromiter((line["y0"] for line in lines), float, len(lines))
+    y1 = np.fromiter((line["y1"] for line in lines), float, len(lines))
+
+    gaps = np.zeros(len(lines))
+    if len(lines) > 1:
+        same_region = (page[1:] == page[:-1]) & (region[1:] == region[:-1])
+        gaps[1:] = np.where(same_region, y0[1:] - y1[:-1], 0.0)
+    return gaps
+
+def build_style_profile(lines):
+    """Font and spacing statistics, computed once per document"""
+    font_chars = Counter()
+    for line in lines:
+        for font in line["fonts"]:
+            font_chars[font] += len(line["text"])
+
+    unique_sizes = sorted({line["font_size"] for line in lines}, reverse=True)
+    if len(unique_sizes) >= 3:
+        size_levels = [unique_sizes[0], unique_sizes[1], unique_sizes[-1]]
+    elif len(unique_sizes) == 2:
+        size_levels = [unique_sizes[0], unique_sizes[1], unique_sizes[1]-2]
+    else:
+        size_levels = [unique_sizes[0], unique_sizes[0]-2, unique_sizes[0]-4]
+
+    gaps = line_gaps(lines)
+    positive_gaps = gaps[gaps > 0]
+    body_font = font_chars.most_common(1)[0][0] if font_chars else None
+
+    return {
+        "size_levels": size_levels,
+        "body_font": body_font,
+        "bold_fonts": sorted(font for font in font_chars if is_bold(font)),
+        "median_gap": float(np.median(positive_gaps)) if len(positive_gaps) else 0.0,
+        "gaps": gaps,
+    }
+
+def score_headings(lines, profile, keywords, page_heights, config_path=WEIGHTS_PATH):
+    """Heading score for every line as one feature-matrix x weights product"""
+    weights, top_fraction, gap_factor = load_heading_config(config_path)
+    n = len(lines)
+    texts = [line["text"].strip() for line in lines]
+
+    sizes = np.fromiter((line["font_size"] for line in lines), float, n)
+    y0 = np.fromiter((line["y0"] for line in lines), float, n)
+    heights = np.fromiter((page_heights[line["page"]] for line in lines), float, n)
+    word_counts = np.fromiter((len(text.split()) for text in texts), int, n)
+
+    levels = profile["size_levels"]
+    size_level = np.select(
+        [sizes >= levels[0] - 1, sizes >= levels[1] - 1, sizes >= levels[2] - 1], [3, 2, 1], 0
+    )
+
+    bold_fonts = set(profile["bold_fonts"])
+    body_is_bold = profile["body_font"] in bold_fonts
+    bold = np.fromiter((any(font in bold_fonts for font in line["fonts"]) for line in lines), bool, n)
+
+    features = np.column_stack([
+        size_level,
+        np.fromiter((text.lower().strip(":.- ") in keywords for text in texts), bool, n),
+        np.fromiter((text.isupper() for text in texts), bool, n),
+        np.fromiter((text.endswith((":", "-")) for text in texts), bool, n),
+        y0 < top_fraction * heights,
+        word_counts <= 5,
+        (word_counts <= 1) & (sizes > levels[0] - 1),  # penalize short large-font lines
+        bold & (not body_is_bold),
+        profile["gaps"] > gap_factor * profile["median_gap"] if profile["median_gap"] else np.zeros(n, bool),
+    ]).astype(float)
+
+    return features @ weights
@@ -0,0 +1,45 @@
+import os
+import re
+import sys
+
+# Address-space cap for every stage script, set by parser.js (PARSER_MEMORY_MB);
+# 0 leaves the process unlimited
+MEMORY_LIMIT_MB = int(os.environ.get("PARSER_MEMORY_MB", "0") or 0)
+
+# Exit status of a stage that ran out of memory under the cap, so the caller
+# can tell it apart from other failures
+MEMORY_EXIT_CODE = 3
+
+# MuPDF reports a failed allocation as a RuntimeError: "code=2: malloc (...)
+# failed", or "out of memory" from the font and image libraries it wraps
+MUPDF_ALLOC_FAILED = re.compile(r"\b(?:m|c|re)alloc\b.*\bfailed\b|\bout of memory\b")
+
+def _exit_on_memory_error(exc_type, exc, tb):
+    sys.__excepthook__(exc_type, exc, tb)
+    if issubclass(exc_type, MemoryError):
+        sys.stderr.flush()
+        os._exit(MEMORY_EXIT_CODE)
+
+def apply_memory_limit(limit_mb=MEMORY_LIMIT_MB):
+    """Cap this process's address space so a pathological PDF fails with
+    MemoryError instead of exhausting the host, and exit with
+    MEMORY_EXIT_CODE when one goes unhandled. A no-op where the resource
+    module is unavailable (Windows)."""
+    if not limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = limit_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    sys.excepthook = _exit_on_memory_error
+
+def is_out_of_memory(error):
+    """True for Python's MemoryError and for MuPDF's allocation failures"""
+    return isinstance(error, MemoryError) or (
+        isinstance(error, RuntimeError) and bool(MUPDF_ALLOC_FAILED.search(str(error)))
+    )
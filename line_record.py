@@ -0,0 +1,63 @@
+import sys
+
+FIELDS = ("text", "x0", "y0", "x1", "y1", "font_size", "fonts", "page",
+          "block", "heading_score", "region", "contains_date")
+
+class LineRecord:
+    """One text line of extract_pdf_layout's output.
+
+    Slots instead of a per-line dict, and fonts as a tuple shared by every
+    line set in the same fonts (see FontTable). Lines are read and updated
+    the way the dict form is (line["text"], line.get("block", 0),
+    line["block"] = 2), so the stages accept either; item access maps
+    straight onto the slots without a Python-level call.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, text, x0, y0, x1, y1, font_size, fonts, page,
+                 block=0, heading_score=0, region=0, contains_date=False):
+        self.text = text
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.font_size = font_size
+        self.fonts = fonts
+        self.page = page
+        self.block = block
+        self.heading_score = heading_score
+        self.region = region
+        self.contains_date = contains_date
+
+    __getitem__ = object.__getattribute__
+    __setitem__ = object.__setattr__
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in FIELDS else default
+
+    def __contains__(self, key):
+        return key in FIELDS
+
+    def keys(self):
+        return FIELDS
+
+    def to_dict(self):
+        record = {field: getattr(self, field) for field in FIELDS}
+        record["fonts"] = list(self.fonts)
+        return record
+
+    def __repr__(self):
+        return f"LineRecord({self.to_dict()!r})"
+
+class FontTable:
+    """Per-document table of font sets: each distinct set of font names is
+    stored once, as a sorted tuple of interned strings"""
+    def __init__(self):
+        self.font_sets = {}
+
+    def intern(self, fonts):
+        key = frozenset(fonts)
+        font_set = self.font_sets.get(key)
+        if font_set is None:
+            font_set = self.font_sets[key] = tuple(sorted(sys.intern(font) for font in key))
+        return font_set
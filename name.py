@@ -2,6 +2,7 @@
 import sys
 import json
 import re
+from limits import MEMORY_EXIT_CODE, apply_memory_limit, is_out_of_memory
 
 def is_name_candidate(text):
     # Accept 1-3 words, capitalized or all-caps
@@ -16,7 +17,33 @@ def is_name_candidate(text):
 def is_probable_email(text):
     return re.match(r"[^@ \t\r\n]+@[^@ \t\r\n]+\.[^@ \t\r\n]+", text) is not None
 
-def find_name(data, page_height):
+def capitalize_name(text):
+    return ' '.join(word.capitalize() for word in text.split())
+
+# How sure each way of finding the name is: a labelled field beats an
+# email-row anchor, which beats picking the most prominent line
+METHOD_CONFIDENCE = {
+    "label": 0.9,
+    "email_anchor": 0.7,
+    "prominent_group": 0.6,
+    "prominent_line": 0.6,
+    "prominent_tie": 0.4,
+    "none": 0.0,
+}
+
+def detect_name(data, page_height):
+    """Return {"name", "confidence", "evidence"}; name is None when nothing
+    looks like one. Evidence holds the method and the line ids (indices into
+    data) the name was read from."""
+    line_ids = {id(item): i for i, item in enumerate(data)}
+
+    def result(name, method, items):
+        return {
+            "name": name,
+            "confidence": METHOD_CONFIDENCE[method],
+            "evidence": {"method": method, "lines": [line_ids[id(item)] for item in items]},
+        }
+
     # With PyMuPDF, smaller y0 is higher on the page
     top_threshold = 0.4 * page_height  # top 40%
     upper_quarter = 0.25 * page_height  # top 25%
@@ -37,7 +64,7 @@ def find_name(data, page_height):
             ):
                 possible_name = item['text'].strip()
                 if len(possible_name.split()) <= 3:
-                    return ' '.join(word.capitalize() for word in possible_name.split())
+                    return result(capitalize_name(possible_name), "label", [label, item])
 
     # Step 2: Email anchor fallback
     for item in data:
@@ -57,13 +84,13 @@ def find_name(data, page_height):
                             0 < len(left_item['text'].strip()) <= 50
                         ):
                             maybe_name = left_item['text'].strip()
-                            return ' '.join(word.capitalize() for word in maybe_name.split())
+                            return result(capitalize_name(maybe_name), "email_anchor", [left_item, item, val])
 
     # Step 3: Candidate logic in top region
     candidates = [item for item in data if item.get('y0', 0) <= top_threshold and is_name_candidate(item['text'])]
 
     if not candidates:
-        return "no name detected"
+        return result(None, "none", [])
 
     def score_no_y(item):
         font_size = item.get('font_size', 0)
@@ -96,30 +123,36 @@ def find_name(data, page_height):
         grouped.sort(key=lambda x: x['x0'])  # left to right
         name = ' '.join(item['text'] for item in grouped).strip()
         if 1 <= len(name.split()) <= 3:
-            return ' '.join(word.capitalize() for word in name.split())
+            return result(capitalize_name(name), "prominent_group", grouped)
         else:
             best = max(candidates, key=score_with_y)
-            return ' '.join(word.capitalize() for word in best['text'].split())
+            return result(capitalize_name(best['text']), "prominent_tie", [best])
     elif top_items:
         best = max(candidates, key=score_with_y)
-        return ' '.join(word.capitalize() for word in best['text'].split())
+        # Several equally prominent lines apart from each other: less certain
+        method = "prominent_line" if len(top_items) == 1 else "prominent_tie"
+        return result(capitalize_name(best['text']), method, [best])
     else:
-        return "no name detected"
+        return result(None, "none", [])
+
+def find_name(data, page_height):
+    """The detected name, or None"""
+    return detect_name(data, page_height)["name"]
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python name.py '<json_string>'", file=sys.stderr)
+        print("Usage: python name.py '<json_string>' (or - to read it from stdin)", file=sys.stderr)
         sys.exit(1)
 
-    json_str = sys.argv[1]
+    apply_memory_limit()
     try:
+        json_str = sys.stdin.read() if sys.argv[1] == "-" else sys.argv[1]
         obj = json.loads(json_str)
         data = obj.get('data', [])
         page_height = obj.get('page_height', 1000)
     except Exception as e:
         print("Failed to parse JSON:", e, file=sys.stderr)
-        sys.exit(1)
+        sys.exit(MEMORY_EXIT_CODE if is_out_of_memory(e) else 1)
 
-    name = find_name(data, page_height)
-    print(name)
+    print(json.dumps(detect_name(data, page_height)))
@@ -0,0 +1,40 @@
+import sys
+import json
+
+# Fields the downstream stages (name.py, the section extractors, extra.py) read
+COMPACT_FIELDS = ("text", "x0", "y0", "x1", "y1", "font_size", "fonts", "page", "block")
+
+# Layout internals that are only useful when debugging block detection
+DEBUG_FIELDS = ("heading_score", "region", "contains_date")
+
+OUTPUT_PROFILES = ("compact", "debug")
+OUTPUT_FORMATS = ("json", "msgpack")
+
+def compact_line(line):
+    record = {field: line[field] for field in COMPACT_FIELDS}
+    for field in ("x0", "y0", "x1", "y1", "font_size"):
+        record[field] = round(record[field], 1)
+    return record
+
+def debug_line(line):
+    record = {field: line[field] for field in COMPACT_FIELDS}
+    for field in DEBUG_FIELDS:
+        record[field] = line[field]
+    return record
+
+def select_fields(lines, profile="compact"):
+    if profile == "debug":
+        return [debug_line(line) for line in lines]
+    return [compact_line(line) for line in lines]
+
+def write_output(obj, fmt="json"):
+    if fmt == "msgpack":
+        try:
+            import msgpack
+        except ImportError:
+            print("msgpack output requires the 'msgpack' package", file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.buffer.write(msgpack.packb(obj, use_bin_type=True))
+        sys.stdout.buffer.flush()
+    else:
+        print(json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
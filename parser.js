@@ -1,8 +1,85 @@
 
 const fs = require('fs');
 const path = require('path');
-const pdfParse = require('pdf-parse');
 const { execFile } = require('child_process');
+const { textFingerprint } = require('./utils/fingerprint');
+
+// Set PARSER_DEBUG=1 to log raw extraction output and the detected blocks.
+// extract.py then also emits its scoring/column internals (--output debug).
+const DEBUG = process.env.PARSER_DEBUG === '1';
+const EXTRACT_OUTPUT = DEBUG ? 'debug' : 'compact';
+
+// Caps for very large PDFs (publication lists, scanned portfolios). extract.py
+// stops reading past them and reports the cut in its "truncated" field.
+const EXTRACT_MAX_PAGES = process.env.EXTRACT_MAX_PAGES || '40';
+const EXTRACT_MAX_LINES = process.env.EXTRACT_MAX_LINES || '5000';
+
+// OCR renders every page, so scanned resumes get a tighter page cap. The DPI
+// trades accuracy for throughput; 150 is enough for typical resume body text.
+const OCR_MAX_PAGES = process.env.OCR_MAX_PAGES || '5';
+const OCR_DPI = process.env.OCR_DPI || '150';
+
+// Each extractor reports a 0..1 confidence with the evidence behind it. A
+// result is flagged needsReview when one of these fields scores below the
+// threshold, so only those documents need the slower fallback path.
+const REVIEW_CONFIDENCE = parseFloat(process.env.REVIEW_CONFIDENCE || '0.5');
+const REVIEW_FIELDS = ['name', 'skills', 'education', 'experience'];
+
+// Every stage runs supervised: a script that outlives its wall-clock budget
+// is killed (SIGKILL, so a hung PyMuPDF call can't ignore it) and the next
+// document gets a fresh process. Every script also caps its address space
+// at PARSER_MEMORY_MB (limits.py) and exits with code 3 when it runs out. OCR renders and recognises every page, hence its own budget.
+const STAGE_TIMEOUT_MS = Number(process.env.STAGE_TIMEOUT_MS || 30000);
+const EXTRACT_TIMEOUT_MS = Number(process.env.EXTRACT_TIMEOUT_MS || 120000);
+const OCR_TIMEOUT_MS = Number(process.env.OCR_TIMEOUT_MS || 300000);
+const PARSER_MEMORY_MB = process.env.PARSER_MEMORY_MB || '2048';
+const MEMORY_EXIT_CODE = 3;
+
+const stageOptions = (timeout) => ({
+  timeout,
+  killSignal: 'SIGKILL',
+  maxBuffer: 64 * 1024 * 1024,
+  env: { ...process.env, PARSER_MEMORY_MB }
+});
+
+// A stage that did not finish. code is "timeout", "memory", "crash" (killed
+// by a signal) or "failed" (exited with an error); toJSON is what is stored.
+class ParseError extends Error {
+  constructor(code, stage, message) {
+    super(message);
+    this.name = 'ParseError';
+    this.code = code;
+    this.stage = stage;
+  }
+
+  toJSON() {
+    return { code: this.code, stage: this.stage, message: this.message };
+  }
+}
+
+// Stage input goes over stdin ("-" in place of the JSON argument): the layout
+// JSON of a document at the page/line caps is far larger than the 128 KiB
+// Linux allows for a single argv string
+const sendInput = (child, input) => {
+  // A stage that dies early reports it through its exit status instead
+  child.stdin.on('error', () => {});
+  child.stdin.end(input);
+};
+
+// Classify an execFile error by how the script ended
+function stageError(stage, error, stderr) {
+  if (error.killed && error.signal === 'SIGKILL') {
+    return new ParseError('timeout', stage, `${stage} did not finish in time and was killed`);
+  }
+  if (error.code === MEMORY_EXIT_CODE) {
+    return new ParseError('memory', stage, `${stage} ran out of memory (limit ${PARSER_MEMORY_MB} MB)`);
+  }
+  if (error.signal) {
+    return new ParseError('crash', stage, `${stage} was killed by ${error.signal}`);
+  }
+  const detail = String(stderr || '').trim().split('\n').pop();
+  return new ParseError('failed', stage, detail || error.message);
+}
 
 
 
@@ -35,26 +112,70 @@ function printExtractedBlocks(extractedData) {
 
 
 
+// Extraction profiles (profiles/<name>.json) hold the heading keywords,
+// patterns and thresholds; scripts fall back to EXTRACTION_PROFILE or "default"
+const profileArgs = (profile) => (profile ? ['--profile', profile] : []);
+
+// Run prescreen.py: reads only the first pages and decides whether the PDF
+// goes to the normal queue, the slow queue, or is rejected outright. Resolves
+// null when it fails outright; rejects with a ParseError on timeout/crash/memory.
+const prescreenPdf = (pdfFilePath, { profile } = {}) => {
+  return new Promise((resolve, reject) => {
+    const prescreenPath = path.join(__dirname, 'prescreen.py');
+
+    const options = stageOptions(STAGE_TIMEOUT_MS);
+    execFile('python', [prescreenPath, pdfFilePath, ...profileArgs(profile)], options, (error, stdout, stderr) => {
+      if (error) {
+        console.error('❌ prescreen.py error:', error.message);
+        const failure = stageError('prescreen', error, stderr);
+        return failure.code === 'failed' ? resolve(null) : reject(failure);
+      }
+
+      try {
+        resolve(JSON.parse(stdout));
+      } catch (e) {
+        console.error('❌ Failed to parse prescreen JSON:', e.message);
+        resolve(null);
+      }
+    });
+  });
+};
+
 // Run extract.py to get detailed PDF info object
-const extractPdfData = (pdfFilePath) => {
-  return new Promise((resolve) => {
+// The section extractors pick the profile up from the "profile" field of its output.
+// Rejects with a ParseError when the stage fails in any way (a corrupt PDF
+// included), as nothing else can be parsed without its output.
+const extractPdfData = (pdfFilePath, { ocr = false, profile } = {}) => {
+  return new Promise((resolve, reject) => {
     const extractPath = path.join(__dirname, 'extract.py');
-
-    execFile('python', [extractPath, pdfFilePath], (error, stdout, stderr) => {
+    const args = [
+      extractPath, pdfFilePath,
+      '--output', EXTRACT_OUTPUT,
+      '--max-pages', ocr ? OCR_MAX_PAGES : EXTRACT_MAX_PAGES,
+      '--max-lines', EXTRACT_MAX_LINES,
+      ...profileArgs(profile)
+    ];
+    if (ocr) args.push('--ocr', '--ocr-dpi', OCR_DPI);
+
+    const options = stageOptions(ocr ? OCR_TIMEOUT_MS : EXTRACT_TIMEOUT_MS);
+    execFile('python', args, options, (error, stdout, stderr) => {
       if (error) {
         console.error('❌ extract.py error:', error.message);
-        return resolve(null);
+        return reject(stageError('extract', error, stderr));
       }
-       console.log('📤 STDOUT from extract.py:', stdout);
-      console.log('⚠️ STDERR from extract.py:', stderr);
+      if (DEBUG) console.log('📤 STDOUT from extract.py:', stdout);
+      if (stderr) console.warn('⚠️ STDERR from extract.py:', stderr);
 
       try {
         const data = JSON.parse(stdout);
+        if (data.truncated) {
+          console.warn(`⚠️ extract.py truncated ${path.basename(pdfFilePath)}:`, data.truncated);
+        }
         // console.log('✅ Raw JSON from extract.py:', stdout);
         resolve(data);
       } catch (e) {
         console.error('❌ Failed to parse JSON from extract.py:', e.message);
-        resolve(null);
+        reject(new ParseError('failed', 'extract', `invalid output: ${e.message}`));
       }
     });
   });
@@ -66,14 +187,25 @@ const getNameFromExtractedData = (extractedData) => {
     const namePath = path.join(__dirname, 'name.py');
     const jsonStr = JSON.stringify(extractedData);
 
-    execFile('python', [namePath, jsonStr], (error, stdout, stderr) => {
+    const child = execFile('python', [namePath, '-'], stageOptions(STAGE_TIMEOUT_MS), (error, stdout, stderr) => {
       if (error) {
         console.error('❌ name.py error:', error.message);
-        return resolve(null);
+        return resolve({ error: stageError('name', error, stderr), name: null, confidence: 0, evidence: null });
       }
 
-      resolve(stdout.trim());
+      try {
+        const result = JSON.parse(stdout);
+        resolve({
+          name: result.name || null,
+          confidence: result.confidence || 0,
+          evidence: result.evidence || null
+        });
+      } catch (e) {
+        console.error('❌ Failed to parse name JSON:', e.message);
+        resolve({ error: new ParseError('failed', 'name', `invalid output: ${e.message}`), name: null, confidence: 0, evidence: null });
+      }
     });
+    sendInput(child, jsonStr);
   });
 };
 
@@ -85,23 +217,27 @@ const getSkillsFromExtractedData = (extractedData) => {
     const skillsPath = path.join(__dirname, 'skills.py');
     const jsonStr = JSON.stringify(extractedData);
 
-    execFile('python', [skillsPath, jsonStr], (error, stdout, stderr) => {
+    const child = execFile('python', [skillsPath, '-'], stageOptions(STAGE_TIMEOUT_MS), (error, stdout, stderr) => {
       if (error) {
         console.error('❌ skills.py error:', error.message);
-        return resolve({ skills: [], used_block: null });
+        return resolve({ error: stageError('skills', error, stderr), skills: [], skill_ids: [], used_blocks: [], confidence: 0, evidence: null });
       }
 
       try {
         const result = JSON.parse(stdout);
         resolve({
           skills: result.skills || [],
-          used_block: result.used_block ?? null
+          skill_ids: result.skill_ids || [],
+          used_blocks: result.used_blocks || [],
+          confidence: result.confidence || 0,
+          evidence: result.evidence || null
         });
       } catch (e) {
         console.error('❌ Failed to parse skills JSON:', e.message);
-        resolve({ skills: [], used_block: null });
+        resolve({ error: new ParseError('failed', 'skills', `invalid output: ${e.message}`), skills: [], skill_ids: [], used_blocks: [], confidence: 0, evidence: null });
       }
     });
+    sendInput(child, jsonStr);
   });
 };
 
@@ -110,23 +246,26 @@ const getExperienceFromExtractedData = (extractedData) => {
     const experiencePath = path.join(__dirname, 'experience.py');
     const jsonStr = JSON.stringify(extractedData);
 
-    execFile('python', [experiencePath, jsonStr], (error, stdout, stderr) => {
+    const child = execFile('python', [experiencePath, '-'], stageOptions(STAGE_TIMEOUT_MS), (error, stdout, stderr) => {
       if (error) {
         console.error('❌ experience.py error:', error.message);
-        return resolve({ experience: [], used_block: null });
+        return resolve({ error: stageError('experience', error, stderr), experience: [], used_blocks: [], confidence: 0, evidence: null });
       }
 
       try {
         const result = JSON.parse(stdout);
         resolve({
           experience: result.experience || [],
-          used_block: result.used_block ?? null
+          used_blocks: result.used_blocks || [],
+          confidence: result.confidence || 0,
+          evidence: result.evidence || null
         });
       } catch (e) {
         console.error('❌ Failed to parse experience JSON:', e.message);
-        resolve({ experience: [], used_block: null });
+        resolve({ error: new ParseError('failed', 'experience', `invalid output: ${e.message}`), experience: [], used_blocks: [], confidence: 0, evidence: null });
       }
     });
+    sendInput(child, jsonStr);
   });
 };
 const getEducationFromExtractedData = (extractedData) => {
@@ -134,23 +273,26 @@ const getEducationFromExtractedData = (extractedData) => {
     const educationPath = path.join(__dirname, 'education.py');
     const jsonStr = JSON.stringify(extractedData);
 
-    execFile('python', [educationPath, jsonStr], (error, stdout, stderr) => {
+    const child = execFile('python', [educationPath, '-'], stageOptions(STAGE_TIMEOUT_MS), (error, stdout, stderr) => {
       if (error) {
         console.error('❌ education.py error:', error.message);
-        return resolve({ education: [], used_block: null });
+        return resolve({ error: stageError('education', error, stderr), education: [], used_blocks: [], confidence: 0, evidence: null });
       }
 
       try {
         const result = JSON.parse(stdout);
         resolve({
           education: result.education || [],
-          used_block: result.used_block ?? null
+          used_blocks: result.used_blocks || [],
+          confidence: result.confidence || 0,
+          evidence: result.evidence || null
         });
       } catch (e) {
         console.error('❌ Failed to parse education JSON:', e.message);
-        resolve({ education: [], used_block: null });
+        resolve({ error: new ParseError('failed', 'education', `invalid output: ${e.message}`), education: [], used_blocks: [], confidence: 0, evidence: null });
       }
     });
+    sendInput(child, jsonStr);
   });
 };
 const getProjectsFromExtractedData = (extractedData) => {
@@ -158,23 +300,26 @@ const getProjectsFromExtractedData = (extractedData) => {
     const projectsPath = path.join(__dirname, 'projects.py');
     const jsonStr = JSON.stringify(extractedData);
 
-    execFile('python', [projectsPath, jsonStr], (error, stdout, stderr) => {
+    const child = execFile('python', [projectsPath, '-'], stageOptions(STAGE_TIMEOUT_MS), (error, stdout, stderr) => {
       if (error) {
         console.error('❌ projects.py error:', error.message);
-        return resolve({ projects: [], used_block: null });
+        return resolve({ error: stageError('projects', error, stderr), projects: [], used_blocks: [], confidence: 0, evidence: null });
       }
 
       try {
         const result = JSON.parse(stdout);
         resolve({
           projects: result.projects || [],
-          used_block: result.used_block ?? null
+          used_blocks: result.used_blocks || [],
+          confidence: result.confidence || 0,
+          evidence: result.evidence || null
         });
       } catch (e) {
         console.error('❌ Failed to parse projects JSON:', e.message);
-        resolve({ projects: [], used_block: null });
+        resolve({ error: new ParseError('failed', 'projects', `invalid output: ${e.message}`), projects: [], used_blocks: [], confidence: 0, evidence: null });
       }
     });
+    sendInput(child, jsonStr);
   });
 };
 const getAchievementsFromExtractedData = (extractedData) => {
@@ -182,23 +327,26 @@ const getAchievementsFromExtractedData = (extractedData) => {
     const achievementsPath = path.join(__dirname, 'achievements.py');
     const jsonStr = JSON.stringify(extractedData);
 
-    execFile('python', [achievementsPath, jsonStr], (error, stdout, stderr) => {
+    const child = execFile('python', [achievementsPath, '-'], stageOptions(STAGE_TIMEOUT_MS), (error, stdout, stderr) => {
       if (error) {
         console.error('❌ achievements.py error:', error.message);
-        return resolve({ achievements: [], used_block: null });
+        return resolve({ error: stageError('achievements', error, stderr), achievements: [], used_blocks: [], confidence: 0, evidence: null });
       }
 
       try {
         const result = JSON.parse(stdout);
         resolve({
           achievements: result.achievements || [],
-          used_block: result.used_block ?? null
+          used_blocks: result.used_blocks || [],
+          confidence: result.confidence || 0,
+          evidence: result.evidence || null
         });
       } catch (e) {
         console.error('❌ Failed to parse achievements JSON:', e.message);
-        resolve({ achievements: [], used_block: null });
+        resolve({ error: new ParseError('failed', 'achievements', `invalid output: ${e.message}`), achievements: [], used_blocks: [], confidence: 0, evidence: null });
       }
     });
+    sendInput(child, jsonStr);
   });
 };
 
@@ -211,62 +359,58 @@ const getExtraFromExtractedData = (extractedData, usedBlockSet = []) => {
     const jsonStr = JSON.stringify(extractedData || {});
     const usedBlocksStr = JSON.stringify([...usedBlockSet]);
 
-    execFile('python', [extraPath, jsonStr, usedBlocksStr], (error, stdout, stderr) => {
+    const child = execFile('python', [extraPath, '-', usedBlocksStr], stageOptions(STAGE_TIMEOUT_MS), (error, stdout, stderr) => {
       if (error) {
         console.error('❌ extra.py error:', error.message);
-        return resolve({});
+        return resolve({ error: stageError('extra', error, stderr) });
       }
 
       try {
         resolve(JSON.parse(stdout));
       } catch (e) {
         console.error('❌ Failed to parse extra JSON:', e.message);
-        resolve({});
+        resolve({ error: new ParseError('failed', 'extra', `invalid output: ${e.message}`) });
       }
     });
+    sendInput(child, jsonStr);
   });
 };
 
 
 // Main function to parse a resume PDF
-async function parseResume(filePath) {
+// options.ocr: read text through Tesseract (image-only PDFs from the OCR lane)
+// options.profile: extraction profile name (customer/locale conventions)
+async function parseResume(filePath, options = {}) {
   let finalText = '';
   let extractedData = null;
 
   try {
-    const dataBuffer = fs.readFileSync(filePath);
-    const pdfData = await pdfParse(dataBuffer);
-    
-    finalText = pdfData.text;
-
-    // Run extract.py for structured fallback data
-    extractedData = await extractPdfData(filePath);
-    
-    const usedBlockSet = new Set();
-
-
-    // If the extracted text is too short, use fallback
-    if (!finalText || finalText.trim().length < 10) {
-      if (extractedData && Array.isArray(extractedData.data)) {
-        finalText = extractedData.data
-          .map(item => item.text)
-          .filter(line => line && line.trim().length > 0)
-          .join('\n')
-          .trim();
-
-        console.log('✅ Fallback used. Final text:');
-      } else {
-        console.warn('⚠️ Fallback extraction failed: No valid "data" array.');
-      }
+    // extract.py reads the PDF straight from disk; its lines double as the
+    // plain text for email/phone matching, so the file is never loaded into Node
+    extractedData = await extractPdfData(filePath, { ocr: !!options.ocr, profile: options.profile });
+
+    if (extractedData && Array.isArray(extractedData.data)) {
+      finalText = extractedData.data
+        .map(item => item.text)
+        .filter(line => line && line.trim().length > 0)
+        .join('\n')
+        .trim();
+    } else {
+      console.warn('⚠️ Extraction failed: No valid "data" array.');
     }
 
-      console.log(finalText);
-      console.log("BLOCKS");
-      printExtractedBlocks(extractedData.data);
+      if (DEBUG) {
+        console.log(finalText);
+        console.log("BLOCKS");
+        if (extractedData && Array.isArray(extractedData.data)) printExtractedBlocks(extractedData.data);
+      }
       // printTextBlocks(finalText);
 
   } catch (err) {
     console.error('❌ Error parsing PDF:', err.message);
+    // A failed extract stage (timeout, crash, memory, unreadable PDF) is the
+    // caller's to handle
+    if (err instanceof ParseError) throw err;
     return null;
   }
 
@@ -300,34 +444,43 @@ async function parseResume(filePath) {
     if (matchedPhone) phoneMatch = matchedPhone;
   }
 
-  const usedBlockSet = new Set();
-
-
-  const name = extractedData ? await getNameFromExtractedData(extractedData): null;
-  const skillResult = extractedData ? await getSkillsFromExtractedData(extractedData) : { skills: [], used_block: null };
+  // The extractors only read extractedData, so they run side by side and the
+  // stage takes as long as the slowest of them; extra.py is the join step,
+  // as it needs the blocks the sections claimed
+  const [nameResult, skillResult, educationResult, experienceResult, projectsResult, achievementsResult] =
+    extractedData
+      ? await Promise.all([
+          getNameFromExtractedData(extractedData),
+          getSkillsFromExtractedData(extractedData),
+          getEducationFromExtractedData(extractedData),
+          getExperienceFromExtractedData(extractedData),
+          getProjectsFromExtractedData(extractedData),
+          getAchievementsFromExtractedData(extractedData)
+        ])
+      : [
+          { name: null, confidence: 0, evidence: null },
+          { skills: [], skill_ids: [], used_blocks: [], confidence: 0, evidence: null },
+          { education: [], used_blocks: [], confidence: 0, evidence: null },
+          { experience: [], used_blocks: [], confidence: 0, evidence: null },
+          { projects: [], used_blocks: [], confidence: 0, evidence: null },
+          { achievements: [], used_blocks: [], confidence: 0, evidence: null }
+        ];
+
+  const name = nameResult.name;
   const skills = skillResult.skills;
-  if (skillResult.used_block !== null) usedBlockSet.add(skillResult.used_block);
-
-  const educationResult = extractedData ? await getEducationFromExtractedData(extractedData) : { education: [], used_block: null };
+  const skillIds = skillResult.skill_ids;
   const education = educationResult.education;
-  if (educationResult.used_block !== null) usedBlockSet.add(educationResult.used_block);
-
-  const experienceResult = extractedData ? await getExperienceFromExtractedData(extractedData) : { experience: [], used_block: null };
   const experience = experienceResult.experience;
-  if (experienceResult.used_block !== null) usedBlockSet.add(experienceResult.used_block);
-
-  const projectsResult = extractedData ? await getProjectsFromExtractedData(extractedData) : { projects: [], used_block: null };
   const projects = projectsResult.projects;
-  if (projectsResult.used_block !== null) usedBlockSet.add(projectsResult.used_block);
-
-  const achievementsResult = extractedData ? await getAchievementsFromExtractedData(extractedData) : { achievements: [], used_block: null };
   const achievements = achievementsResult.achievements;
-  if (achievementsResult.used_block !== null) usedBlockSet.add(achievementsResult.used_block);
 
-// Assuming usedBlockSet is a Set containing block numbers already used
-const otherInfo = extractedData
-  ? await getExtraFromExtractedData(extractedData, usedBlockSet)
-  : {};
+  const usedBlockSet = new Set();
+  [skillResult, educationResult, experienceResult, projectsResult, achievementsResult]
+    .forEach(result => result.used_blocks.forEach(block => usedBlockSet.add(block)));
+
+  const { error: extraError, ...otherInfo } = extractedData
+    ? await getExtraFromExtractedData(extractedData, usedBlockSet)
+    : {};
 
 
   // Parsed resume data
@@ -336,12 +489,45 @@ const otherInfo = extractedData
     email: emailMatch ? emailMatch[0] : null,
     phone: phoneMatch ? phoneMatch[0] : null,
     skills: skills,
+    skillIds: skillIds,
     education: education,
     experience: experience,
     projects: projects,
     achievements: achievements,
     otherInfo: otherInfo
   };
+  if (extractedData && extractedData.truncated) parsedData.truncated = extractedData.truncated;
+
+  const fieldResults = {
+    name: nameResult,
+    skills: skillResult,
+    education: educationResult,
+    experience: experienceResult,
+    projects: projectsResult,
+    achievements: achievementsResult
+  };
+  parsedData.confidence = {};
+  parsedData.evidence = {};
+  for (const [field, result] of Object.entries(fieldResults)) {
+    parsedData.confidence[field] = result.confidence;
+    parsedData.evidence[field] = result.evidence;
+  }
+  // Stages that failed or were killed; their fields keep the empty defaults
+  const errors = [...Object.values(fieldResults).map(result => result.error), extraError].filter(Boolean);
+  if (errors.length) parsedData.errors = errors.map(error => error.toJSON());
+  const lowConfidence = REVIEW_FIELDS.filter(field => parsedData.confidence[field] < REVIEW_CONFIDENCE);
+  parsedData.needsReview = lowConfidence.length > 0;
+  if (parsedData.needsReview) parsedData.lowConfidence = lowConfidence;
+  if (extractedData && extractedData.locales && extractedData.locales.length) {
+    parsedData.locales = extractedData.locales;
+  }
+
+  // MinHash of the layout text for near-duplicate detection; the store keeps
+  // it out of the saved result
+  const layoutText = extractedData && Array.isArray(extractedData.data)
+    ? extractedData.data.map(item => item.text).join('\n')
+    : finalText;
+  parsedData.fingerprint = textFingerprint(layoutText);
 
   // Delete file after processing
   // fs.unlink(filePath, (err) => {
@@ -351,4 +537,6 @@ const otherInfo = extractedData
   return parsedData;
 }
 
-module.exports = parseResume;
\ No newline at end of file
+module.exports = parseResume;
+module.exports.prescreenPdf = prescreenPdf;
+module.exports.ParseError = ParseError;
\ No newline at end of file
@@ -0,0 +1,12 @@
+import threading
+import fitz  # PyMuPDF
+
+# PyMuPDF documents must not be used from several threads at once; everything
+# that opens or reads a PDF in this process holds this lock while doing so
+FITZ_LOCK = threading.RLock()
+
+def open_pdf(source):
+    """Open a PDF from a path or from its bytes, without a temp file"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=bytes(source), filetype="pdf")
+    return fitz.open(source)
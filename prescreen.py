@@ -0,0 +1,106 @@
+import re
+import sys
+import json
+import argparse
+from profiles import load_profile
+from pdf_source import FITZ_LOCK, open_pdf
+from limits import MEMORY_EXIT_CODE, apply_memory_limit, is_out_of_memory
+
+SCREEN_PAGES = 2        # only the first pages are read
+MAX_FAST_PAGES = 5      # longer documents go to the slow queue
+MIN_TEXT_CHARS = 50     # below this the PDF is treated as image-only
+
+EMAIL_PATTERN = re.compile(r'[^@\s]+@[^@\s]+\.[a-zA-Z]{2,}')
+PHONE_PATTERN = re.compile(r'\+?\d[\d\s\-()]{8,}\d')
+YEAR_PATTERN = re.compile(r'\b(?:19|20)\d{2}\b')
+
+def resume_likelihood(text, profile):
+    """Score 0..1 from cheap signals: section headings, contact details, dates"""
+    lines = [line.strip().lower().strip(":.- ") for line in text.splitlines()]
+    lower = text.lower()
+    points = 0
+
+    headings = {line for line in lines if line in profile.heading_keywords}
+    points += min(len(headings), 4) * 1.5
+    if EMAIL_PATTERN.search(text):
+        points += 2
+    if PHONE_PATTERN.search(text):
+        points += 1
+    if len(YEAR_PATTERN.findall(text)) >= 2:
+        points += 1
+    points -= 3 * sum(1 for keyword in profile.non_resume_keywords if keyword in lower)
+
+    return max(0.0, min(1.0, points / 8)), sorted(headings)
+
+def prescreen_pdf(pdf_path, pages=SCREEN_PAGES, profile=None):
+    """Decide how a PDF should be processed without running full extraction.
+
+    verdict is "accept" (normal queue), "ocr" (no text layer, OCR lane),
+    "slow" (very long documents) or "reject" (unreadable or not a resume).
+    Headings, non-resume keywords and the reject score come from the profile.
+    pdf_path may also be the PDF's bytes.
+    """
+    profile = profile or load_profile()
+    with FITZ_LOCK:
+        try:
+            doc = open_pdf(pdf_path)
+        except Exception as e:
+            return {"verdict": "reject", "reasons": [f"unreadable PDF: {e}"], "page_count": 0,
+                    "has_text_layer": False, "score": 0.0, "headings": []}
+
+        with doc:
+            page_count = len(doc)
+            text = ""
+            for page_num in range(min(pages, page_count)):
+                text += doc.load_page(page_num).get_text("text") + "\n"
+
+    has_text_layer = len(text.strip()) >= MIN_TEXT_CHARS
+    if has_text_layer:
+        profile = profile.localized(profile.detect_locales(text.splitlines()))
+    score, headings = resume_likelihood(text, profile) if has_text_layer else (0.0, [])
+    reasons = []
+
+    if page_count == 0:
+        verdict = "reject"
+        reasons.append("empty document")
+    elif not has_text_layer:
+        verdict = "ocr"
+        reasons.append("no text layer")
+    elif score < profile.reject_below:
+        verdict = "reject"
+        reasons.append(f"low resume likelihood ({score:.2f})")
+    elif page_count > MAX_FAST_PAGES:
+        verdict = "slow"
+        reasons.append(f"{page_count} pages")
+    else:
+        verdict = "accept"
+
+    return {
+        "verdict": verdict,
+        "reasons": reasons,
+        "page_count": page_count,
+        "has_text_layer": has_text_layer,
+        "score": round(score, 2),
+        "headings": headings
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cheap resume pre-screen for a PDF")
+    parser.add_argument("pdf_path")
+    parser.add_argument("--pages", type=int, default=SCREEN_PAGES, help="number of leading pages to read")
+    parser.add_argument("--profile", default=None, help="extraction profile name")
+    args = parser.parse_args()
+
+    apply_memory_limit()
+    try:
+        profile = load_profile(args.profile)
+    except ValueError as e:
+        print(f"Prescreen failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        print(json.dumps(prescreen_pdf(args.pdf_path, args.pages, profile)))
+    except RuntimeError as e:
+        if not is_out_of_memory(e):
+            raise
+        print(f"Prescreen failed: {e}", file=sys.stderr)
+        sys.exit(MEMORY_EXIT_CODE)
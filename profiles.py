@@ -0,0 +1,253 @@
+"""Extraction profiles: heading keywords, ignore phrases, patterns and
+thresholds for extract.py, prescreen.py and the section extractors.
+
+A profile is profiles/<name>.json (or .yaml/.yml when PyYAML is installed).
+It may name a parent with "extends" and override only what differs, so a
+customer profile usually holds a handful of keys on top of "default":
+
+    {"extends": "default", "layout": {"max_blocks": 12},
+     "sections": {"skills": {"headings": ["skills", "stack"]}}}
+
+Lists and scalars replace the parent's value; objects are merged key by key.
+Compiled profiles are cached per process, keyed on the path and mtime of
+every file in the chain, so an edited profile is picked up on the next
+request without restarting the server.
+
+The profile's "locales" list names profiles/locales/<code>.json files with
+headings, month-name prefixes and "present" words in other languages;
+patterns refer to a month name as {month} and to open-ended dates as
+{present}.
+detect_locales() guesses the languages from a document's first lines and
+localized() folds those locales into the same sets and regexes, so a
+multilingual document is still matched in a single pass.
+"""
+import os
+import re
+import json
+from functools import lru_cache
+
+PROFILES_DIR = os.environ.get(
+    "EXTRACTION_PROFILES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+)
+DEFAULT_PROFILE = os.environ.get("EXTRACTION_PROFILE", "default")
+PROFILE_EXTENSIONS = (".json", ".yaml", ".yml")
+PROFILE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+DETECT_LINES = 40       # leading lines (reading order) the language is guessed from
+MIN_LOCALE_HITS = 4     # stopword hits (a heading counts triple) before a locale applies
+MIN_LOCALE_SHARE = 0.5  # ...and at least this share of the English hits
+HEADING_HIT_WEIGHT = 3
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)?")
+
+def normalize_heading(text):
+    return text.lower().strip(".:- ")
+
+def unique(items):
+    return list(dict.fromkeys(items))
+
+def find_config_file(directory, name, kind="profile"):
+    if not PROFILE_NAME_PATTERN.match(name):
+        raise ValueError(f"invalid {kind} name: {name!r}")
+    for ext in PROFILE_EXTENSIONS:
+        path = os.path.join(directory, name + ext)
+        if os.path.exists(path):
+            return path
+    raise ValueError(f"unknown {kind}: {name!r}")
+
+@lru_cache(maxsize=64)
+def read_profile_file(path, mtime):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{os.path.basename(path)} needs the 'pyyaml' package")
+        return yaml.safe_load(f) or {}
+
+def merge_config(base, override):
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+def compile_patterns(patterns):
+    """One case-insensitive alternation, so a line is scanned once"""
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+class Locale:
+    """One profiles/locales/<code>.json file"""
+    def __init__(self, code, config):
+        self.code = code
+        self.config = config
+        self.sections = config.get("sections", {})
+        self.stopwords = frozenset(word.lower() for word in config.get("stopwords", []))
+        self.headings = frozenset(normalize_heading(h) for h in config.get("headings", [])).union(
+            *(map(normalize_heading, section.get("headings", [])) for section in self.sections.values())
+        )
+
+@lru_cache(maxsize=64)
+def compile_locale(code, path, mtime):
+    return Locale(code, read_profile_file(path, mtime))
+
+def load_locale(code):
+    path = find_config_file(os.path.join(PROFILES_DIR, "locales"), code, "locale")
+    return compile_locale(code, path, os.path.getmtime(path))
+
+class SectionMatcher:
+    """Compiled settings for one section extractor.
+
+    Locale sections add headings, ignore phrases and fallback keywords; their
+    patterns are OR-ed into the pattern of the same name and list options
+    are extended.
+    """
+    def __init__(self, config, locale_configs=(), expand=lambda pattern: pattern):
+        layers = [config, *locale_configs]
+        self.headings = frozenset(normalize_heading(h) for layer in layers for h in layer.get("headings", []))
+        self.ignore_phrases = frozenset(
+            normalize_heading(p) for layer in layers for p in layer.get("ignore", [])
+        )
+        # Substrings that identify the section when no exact heading is found
+        self.fallback_keywords = tuple(unique(
+            k.lower() for layer in layers for k in layer.get("fallback_keywords", [])
+        ))
+        self.patterns = {}
+        for key, pattern in config.get("patterns", {}).items():
+            alternatives = [expand(pattern)] + [
+                layer["patterns"][key] for layer in locale_configs if key in layer.get("patterns", {})
+            ]
+            if len(alternatives) == 1:
+                self.patterns[key] = re.compile(alternatives[0], re.IGNORECASE)
+            else:
+                self.patterns[key] = compile_patterns(alternatives)
+        self.options = dict(config.get("options", {}))
+        for layer in locale_configs:
+            for key, value in layer.get("options", {}).items():
+                if isinstance(value, list):
+                    self.options[key] = unique(self.options.get(key, []) + value)
+
+class ExtractionProfile:
+    """A profile compiled into the sets and regexes the stages match with"""
+    def __init__(self, name, config, locales=()):
+        self.name = name
+        self.config = config
+        self.available_locales = tuple(config.get("locales", []))
+        self.locales = tuple(locale.code for locale in locales)
+        self._localized = {}
+
+        layout = config["layout"]
+        months = unique(layout["months"] + [m for locale in locales for m in locale.config.get("months", [])])
+        present = unique(layout["present"] + [p for locale in locales for p in locale.config.get("present", [])])
+        placeholders = {
+            # A month name, abbreviated or not: "Mar", "March", "Sept.", "März"
+            "{month}": "(?:" + "|".join(months) + r")[a-z]*\.?",
+            "{present}": "|".join(re.escape(word) for word in present),
+        }
+
+        def expand(pattern):
+            for placeholder, value in placeholders.items():
+                pattern = pattern.replace(placeholder, value)
+            return pattern
+
+        self.heading_keywords = frozenset(normalize_heading(k) for k in layout["heading_keywords"]).union(
+            *(locale.headings for locale in locales)
+        )
+        self.date_pattern = compile_patterns([expand(p) for p in layout["date_patterns"]])
+        self.stopwords = frozenset(word.lower() for word in layout.get("stopwords", []))
+        self.min_blocks = layout["min_blocks"]
+        self.max_blocks = layout["max_blocks"]
+        self.block_gap = layout["block_gap"]
+        self.font_size_change = layout["font_size_change"]
+        self.threshold_range = tuple(layout["threshold_range"])
+        self.default_threshold = layout["default_threshold"]
+        self.split_heading_score = layout["split_heading_score"]
+
+        prescreen = config.get("prescreen", {})
+        self.non_resume_keywords = frozenset(k.lower() for k in prescreen.get("non_resume_keywords", [])).union(
+            *(map(str.lower, locale.config.get("non_resume_keywords", [])) for locale in locales)
+        )
+        self.reject_below = prescreen.get("reject_below", 0.25)
+
+        self.sections = {
+            key: SectionMatcher(section, [locale.sections.get(key, {}) for locale in locales], expand)
+            for key, section in config["sections"].items()
+        }
+        # Every heading that opens a section; used to tell continuation blocks apart
+        self.section_headings = self.heading_keywords.union(
+            (normalize_heading(h) for h in layout.get("other_section_headings", [])),
+            *(section.headings for section in self.sections.values())
+        )
+
+    def detect_locales(self, texts):
+        """Codes of the profile's locales the first DETECT_LINES texts are
+        written in: none for English, several for a mixed document"""
+        texts = texts[:DETECT_LINES]
+        words = [word for text in texts for word in WORD_PATTERN.findall(text.lower())]
+        headings = [normalize_heading(text) for text in texts]
+
+        def hits(stopwords, heading_set):
+            return (sum(1 for word in words if word in stopwords) +
+                    HEADING_HIT_WEIGHT * sum(1 for heading in headings if heading in heading_set))
+
+        english = hits(self.stopwords, self.heading_keywords)
+        found = []
+        for code in self.available_locales:
+            locale = load_locale(code)
+            score = hits(locale.stopwords, locale.headings)
+            if score >= MIN_LOCALE_HITS and score >= MIN_LOCALE_SHARE * english:
+                found.append(code)
+        return found
+
+    def localized(self, codes):
+        """This profile with the given locales merged in. Compiled once per
+        combination, and again only when one of the locale files changes.
+        A profile that is already localized is returned unchanged."""
+        wanted = set(codes or ())
+        codes = tuple(code for code in self.available_locales if code in wanted)
+        if not codes or self.locales:
+            return self
+        locales = tuple(load_locale(code) for code in codes)
+        if locales not in self._localized:
+            self._localized[locales] = ExtractionProfile(self.name, self.config, locales)
+        return self._localized[locales]
+
+def profile_path(name):
+    return find_config_file(PROFILES_DIR, name)
+
+def resolve_chain(name):
+    """(path, mtime) for the profile and each parent it extends, child first"""
+    chain = []
+    seen = set()
+    while name:
+        if name in seen:
+            raise ValueError(f"profile {name!r} extends itself")
+        seen.add(name)
+        path = profile_path(name)
+        mtime = os.path.getmtime(path)
+        chain.append((path, mtime))
+        name = read_profile_file(path, mtime).get("extends")
+    return tuple(chain)
+
+@lru_cache(maxsize=32)
+def compile_profile(name, chain):
+    config = {}
+    for path, mtime in reversed(chain):
+        config = merge_config(config, read_profile_file(path, mtime))
+    config.pop("extends", None)
+    return ExtractionProfile(name, config)
+
+def load_profile(name=None, locales=()):
+    """Compiled profile by name (None selects DEFAULT_PROFILE), localized to
+    the given locale codes"""
+    name = name or DEFAULT_PROFILE
+    return compile_profile(name, resolve_chain(name)).localized(locales)
+
+def profile_from_input(input_data):
+    """The profile and locales extract.py recorded in its output"""
+    if not isinstance(input_data, dict):
+        return load_profile()
+    return load_profile(input_data.get("profile"), input_data.get("locales"))
@@ -1,34 +1,20 @@
 import sys
 import json
-import re
 from collections import defaultdict
+from sections import claim_blocks, claimed_texts, section_evidence, section_confidence
+from profiles import load_profile, profile_from_input
+from limits import MEMORY_EXIT_CODE, apply_memory_limit, is_out_of_memory
 
 class ProjectsExtractor:
-    def __init__(self):
-        self.project_headings = {
-            'projects', 'personal projects', 'academic projects',
-            'project experience', 'selected projects', 'project portfolio',
-            'research projects', 'technical projects', 'project', 'project details', 'professional projects'
-        }
-        self.ignore_phrases = {
-            'experience', 'education', 'hobbies', 'work',
-            'certifications', 'references', 'skills'
-        }
-        self.project_markers = {
-            '•', '●', '○', '■', '□', '♦', '➢', '➔', '⦿', '◘', '◦', '‣'
-        }
-        self.date_pattern = re.compile(
-            r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*'
-            r'(?:\s+\d{1,2})?(?:\s*[-–—]\s*(?:present|now|current|'
-            r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*'
-            r'(?:\s+\d{1,2})?|\d{4}))?\s*\d{4}\b|\b\d{4}\s*[-–—]\s*\d{4}\b',
-            re.IGNORECASE
-        )
-        self.project_name_pattern = re.compile(
-            r'^(.*?\b(?:project|research|thesis|dissertation|initiative|'
-            r'application|system|platform|tool|software|website|app|bot|visualizer|algorithm)\b.*?)$',
-            re.IGNORECASE
-        )
+    def __init__(self, profile=None):
+        self.profile = profile or load_profile()
+        section = self.profile.sections['projects']
+        self.project_headings = section.headings
+        self.ignore_phrases = section.ignore_phrases
+        self.fallback_keywords = section.fallback_keywords
+        self.project_markers = frozenset(section.options['markers'])
+        self.max_name_words = section.options['max_name_words']
+        self.project_name_pattern = section.patterns['project_name']
 
     def is_project_heading(self, text):
         text_lower = text.lower().strip(".:- ")
@@ -54,8 +40,9 @@ class ProjectsExtractor:
             if not line:
                 continue
                 
-            # Check if we've entered the projects section
-            if not in_projects_section and self.is_project_heading(line):
+            # Check if we've entered the projects section (claimed continuation
+            # blocks can bring a repeated heading along)
+            if self.is_project_heading(line):
                 in_projects_section = True
                 continue
                 
@@ -65,7 +52,7 @@ class ProjectsExtractor:
             # Check if we should start a new project
             if (self.is_project_marker(line) or 
                 (self.is_project_name(line) and not current_project) or
-                (len(line.split()) <= 6 and self.is_project_name(line))):
+                (len(line.split()) <= self.max_name_words and self.is_project_name(line))):
                 
                 if current_project:  # Save previous project if exists
                     projects.append(current_project)
@@ -88,62 +75,90 @@ class ProjectsExtractor:
 
     def process_data(self, data):
         blocks = defaultdict(list)
+        heading_block_ids = []
         self.project_block_id = None
+        self.project_block_ids = []
+        line_ids = defaultdict(list)
+        self.heading_match = "none"
+        self.heading_line = None
         
         # First pass: find all blocks and identify the project block
-        for item in data:
+        for i, item in enumerate(data):
             block_id = item.get('block', 0)
             blocks[block_id].append(item['text'])
+            line_ids[block_id].append(i)
             if self.is_project_heading(item['text']):
                 self.project_block_id = block_id
+                self.heading_match = "exact"
+                if self.heading_line is None:
+                    self.heading_line = i
+                if block_id not in heading_block_ids:
+                    heading_block_ids.append(block_id)
 
         # Second pass: if no exact match, look for partial matches
         if self.project_block_id is None:
             for block_id, texts in blocks.items():
-                for text in texts:
+                for j, text in enumerate(texts):
                     text_lower = text.lower()
-                    if ('project' in text_lower or 'research' in text_lower) and \
+                    if any(keyword in text_lower for keyword in self.fallback_keywords) and \
                        not any(ignore in text_lower for ignore in self.ignore_phrases):
                         self.project_block_id = block_id
+                        self.heading_match = "fallback"
+                        self.heading_line = line_ids[block_id][j]
                         break
                 if self.project_block_id is not None:
                     break
 
         # If we found a project block, extract its contents
         if self.project_block_id is not None:
-            projects = self.extract_project_blocks(blocks[self.project_block_id])
+            self.project_block_ids = claim_blocks(
+                blocks, heading_block_ids or [self.project_block_id], self.profile.section_headings
+            )
+            projects = self.extract_project_blocks(claimed_texts(blocks, self.project_block_ids))
+        else:
+            projects = []
+
+        # Projects that start with a recognised name line are structured
+        structured = sum(1 for proj in projects if 'name' in proj)
+        self.evidence = section_evidence(
+            data, self.heading_match, self.heading_line, heading_block_ids, self.project_block_ids
+        )
+        self.confidence = section_confidence(data, self.evidence, len(projects), structured)
             
-            # Format the projects with sequential numbers
-            formatted_projects = {}
-            for i, proj in enumerate(projects, 1):
-                # Clean up the details by removing markers and empty lines
-                if 'details' in proj:
-                    proj['details'] = [d for d in proj['details'] 
-                                     if not self.is_project_marker(d) and d.strip()]
-                formatted_projects[f"project_{i}"] = proj
+        # Format the projects with sequential numbers
+        formatted_projects = {}
+        for i, proj in enumerate(projects, 1):
+            # Clean up the details by removing markers and empty lines
+            if 'details' in proj:
+                proj['details'] = [d for d in proj['details'] 
+                                 if not self.is_project_marker(d) and d.strip()]
+            formatted_projects[f"project_{i}"] = proj
             
-            return formatted_projects
-        return {}
+        return formatted_projects
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python projects.py '<json_string>'", file=sys.stderr)
+        print("Usage: python projects.py '<json_string>' (or - to read it from stdin)", file=sys.stderr)
         sys.exit(1)
 
+    apply_memory_limit()
     try:
-        input_data = json.loads(sys.argv[1])
+        input_data = json.loads(sys.stdin.read() if sys.argv[1] == "-" else sys.argv[1])
         data = input_data['data'] if isinstance(input_data, dict) and 'data' in input_data else input_data
 
-        extractor = ProjectsExtractor()
+        profile = profile_from_input(input_data)
+        extractor = ProjectsExtractor(profile)
         projects = extractor.process_data(data)
 
         # Output a valid JSON object of projects
         result = {
         "projects": projects,
-        "used_block": extractor.project_block_id  # This is an integer or None
+        "used_blocks": extractor.project_block_ids,
+        "confidence": extractor.confidence,
+        "evidence": extractor.evidence
         }
         print(json.dumps(result))
 
     except Exception as e:
         print(f"Error processing projects: {str(e)}", file=sys.stderr)
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(MEMORY_EXIT_CODE if is_out_of_memory(e) else 1)
\ No newline at end of file
@@ -0,0 +1,91 @@
+import numpy as np
+
+MIN_COLUMN_WIDTH = 0.15  # fraction of the page width the text on each side of a cut must span
+MIN_COLUMN_LINES = 3     # lines each side of a vertical cut must hold
+MIN_VERTICAL_GAP = 6.0   # points of empty space needed between two columns
+BAND_GAP_FACTOR = 0.5    # horizontal cut when the gap exceeds this fraction of a line height
+
+def _widest_gap(starts, ends, min_gap):
+    """Widest empty gap between the merged [start, end] intervals, as
+    (gap_start, gap_end), or None. Intervals are sorted once: O(n log n)."""
+    order = np.argsort(starts, kind="stable")
+    best = None
+    reach = ends[order[0]]
+    for i in order[1:]:
+        if starts[i] - reach >= min_gap and (best is None or starts[i] - reach > best[1] - best[0]):
+            best = (reach, starts[i])
+        reach = max(reach, ends[i])
+    return best
+
+def _band_cuts(y0, y1, min_gap):
+    """Split positions between horizontal bands separated by at least min_gap"""
+    order = np.argsort(y0, kind="stable")
+    cuts = []
+    reach = y1[order[0]]
+    for i in order[1:]:
+        if y0[i] - reach >= min_gap:
+            cuts.append((reach + y0[i]) / 2)
+        reach = max(reach, y1[i])
+    return cuts
+
+def _xy_cut(idx, x0, y0, x1, y1, page_width, band_gap):
+    """Recursive XY-cut returning regions (arrays of line indices) in reading order"""
+    if len(idx) < 2 * MIN_COLUMN_LINES:
+        return [idx]
+
+    # Vertical cut first: columns and sidebars are read one after the other
+    gap = _widest_gap(x0[idx], x1[idx], MIN_VERTICAL_GAP)
+    if gap is not None:
+        split = (gap[0] + gap[1]) / 2
+        left = idx[x1[idx] <= split]
+        right = idx[x0[idx] >= split]
+        wide_enough = (left.size and right.size and
+                       x1[left].max() - x0[left].min() >= MIN_COLUMN_WIDTH * page_width and
+                       x1[right].max() - x0[right].min() >= MIN_COLUMN_WIDTH * page_width)
+        if wide_enough and len(left) >= MIN_COLUMN_LINES and len(right) >= MIN_COLUMN_LINES:
+            return (_xy_cut(left, x0, y0, x1, y1, page_width, band_gap) +
+                    _xy_cut(right, x0, y0, x1, y1, page_width, band_gap))
+
+    # Otherwise split into horizontal bands so a full-width header doesn't hide
+    # the columns below it. Consecutive bands without columns stay one region.
+    cuts = _band_cuts(y0[idx], y1[idx], band_gap)
+    if not cuts:
+        return [idx]
+
+    band_of = np.searchsorted(cuts, y0[idx])
+    regions = []
+    merge_next = False
+    for band in range(len(cuts) + 1):
+        band_idx = idx[band_of == band]
+        if not band_idx.size:
+            continue
+        sub_regions = _xy_cut(band_idx, x0, y0, x1, y1, page_width, band_gap)
+        if len(sub_regions) == 1 and merge_next:
+            regions[-1] = np.concatenate([regions[-1], sub_regions[0]])
+        else:
+            regions.extend(sub_regions)
+        merge_next = len(sub_regions) == 1
+    return regions
+
+def order_page_lines(lines, page_width):
+    """Return the page's lines in reading order with a "region" id on each.
+
+    Uses the page's own width; lines inside a region are ordered top to
+    bottom, then left to right.
+    """
+    if not lines:
+        return lines
+
+    x0 = np.fromiter((line["x0"] for line in lines), float, len(lines))
+    y0 = np.fromiter((line["y0"] for line in lines), float, len(lines))
+    x1 = np.fromiter((line["x1"] for line in lines), float, len(lines))
+    y1 = np.fromiter((line["y1"] for line in lines), float, len(lines))
+    band_gap = BAND_GAP_FACTOR * float(np.median(y1 - y0))
+
+    ordered = []
+    regions = _xy_cut(np.arange(len(lines)), x0, y0, x1, y1, page_width, band_gap)
+    for region_id, region in enumerate(regions):
+        for i in region[np.lexsort((x0[region], y0[region]))]:
+            lines[i]["region"] = region_id
+            ordered.append(lines[i])
+    return ordered
@@ -0,0 +1,241 @@
+"""Accuracy + latency regression harness.
+
+Runs every PDF in a corpus directory through the same stages parser.js runs
+and compares the result with a golden JSON file stored next to it
+(resume.pdf -> resume.json, same shape as the parsed result). Reports
+per-field precision/recall and per-stage latency/memory, and exits non-zero
+when accuracy or latency regress past the tolerances against a baseline, or
+when a document cannot be parsed at all.
+
+    python regression.py corpus/ --update-golden      # (re)write golden files
+    python regression.py corpus/ --write-baseline     # record current metrics
+    python regression.py corpus/                      # compare against baseline
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from statistics import median
+
+from extract import extract_pdf_layout
+from profiles import load_profile
+from name import find_name
+from skills import SkillsExtractor
+from education import EducationExtractor
+from experience import ExperienceExtractor
+from projects import ProjectsExtractor
+from achievements import AchievementsExtractor
+
+FIELDS = ("name", "skills", "education", "experience", "projects", "achievements")
+
+SECTION_EXTRACTORS = {
+    "skills": SkillsExtractor,
+    "education": EducationExtractor,
+    "experience": ExperienceExtractor,
+    "projects": ProjectsExtractor,
+    "achievements": AchievementsExtractor,
+}
+
+STAGES = ("extract", "name") + tuple(SECTION_EXTRACTORS)
+
+def run_pipeline(pdf_path, timings=None, profile=None):
+    """Parse one PDF; when timings is a dict, record seconds per stage into it"""
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        if timings is not None:
+            timings[stage] = time.perf_counter() - start
+        return result
+
+    data, page_height, _, profile = timed("extract", lambda: extract_pdf_layout(pdf_path, profile=profile))
+    # Every stage is timed, even when a blank or image-only PDF gives no lines
+    name = timed("name", lambda: find_name(data, page_height) if data else None)
+    result = {"name": name}
+    for field, extractor_cls in SECTION_EXTRACTORS.items():
+        result[field] = timed(field, lambda: extractor_cls(profile=profile).process_data(data))
+    return result
+
+def measure_memory(pdf_path, profile=None):
+    """Peak Python heap (KiB) per stage. PyMuPDF's C allocations aren't traced."""
+    peaks = {}
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        data, page_height, _, profile = extract_pdf_layout(pdf_path, profile=profile)
+        peaks["extract"] = tracemalloc.get_traced_memory()[1] / 1024
+
+        tracemalloc.reset_peak()
+        if data:
+            find_name(data, page_height)
+        peaks["name"] = tracemalloc.get_traced_memory()[1] / 1024
+
+        for field, extractor_cls in SECTION_EXTRACTORS.items():
+            tracemalloc.reset_peak()
+            extractor_cls(profile=profile).process_data(data)
+            peaks[field] = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+def normalize(text):
+    return " ".join(str(text).lower().split())
+
+def field_items(field, value):
+    """Flatten a field value into the set of strings it is scored on"""
+    if not value:
+        return set()
+    if field == "name":
+        return {normalize(value)}
+    if isinstance(value, list):
+        return {normalize(v) for v in value if str(v).strip()}
+
+    items = set()
+    def walk(v):
+        if isinstance(v, dict):
+            for child in v.values():
+                walk(child)
+        elif isinstance(v, list):
+            for child in v:
+                walk(child)
+        elif str(v).strip():
+            items.add(normalize(v))
+    walk(value)
+    return items
+
+def score(counts):
+    tp, fp, fn = counts
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    return {"precision": round(precision, 4), "recall": round(recall, 4)}
+
+def run_corpus(corpus_dir, repeat=3, update_golden=False, profile=None):
+    pdfs = sorted(f for f in os.listdir(corpus_dir) if f.lower().endswith(".pdf"))
+    counts = {field: [0, 0, 0] for field in FIELDS}
+    stage_times = {stage: [] for stage in STAGES}
+    stage_peaks = {stage: [] for stage in STAGES}
+    documents = 0
+    errors = {}
+
+    for pdf in pdfs:
+        pdf_path = os.path.join(corpus_dir, pdf)
+        golden_path = os.path.splitext(pdf_path)[0] + ".json"
+
+        runs = []
+        try:
+            for _ in range(repeat):
+                timings = {}
+                result = run_pipeline(pdf_path, timings, profile)
+                runs.append(timings)
+            peaks = measure_memory(pdf_path, profile)
+        except Exception as e:
+            # One unreadable document is reported, not the end of the run
+            errors[pdf] = f"{type(e).__name__}: {e}"
+            print(f"error in {pdf}: {errors[pdf]}", file=sys.stderr)
+            continue
+        for stage in STAGES:
+            stage_times[stage].append(median(run[stage] for run in runs))
+        for stage, peak in peaks.items():
+            stage_peaks[stage].append(peak)
+
+        if update_golden:
+            with open(golden_path, "w", encoding="utf-8") as f:
+                json.dump({field: result[field] for field in FIELDS}, f, indent=2, ensure_ascii=False)
+            print(f"wrote {golden_path}")
+            continue
+        if not os.path.exists(golden_path):
+            print(f"skipping {pdf}: no golden file", file=sys.stderr)
+            continue
+
+        with open(golden_path, encoding="utf-8") as f:
+            golden = json.load(f)
+        documents += 1
+        for field in FIELDS:
+            expected = field_items(field, golden.get(field))
+            actual = field_items(field, result.get(field))
+            counts[field][0] += len(expected & actual)
+            counts[field][1] += len(actual - expected)
+            counts[field][2] += len(expected - actual)
+
+    return {
+        "documents": documents,
+        "errors": errors,
+        "fields": {field: score(counts[field]) for field in FIELDS},
+        "stages": {
+            stage: {
+                "median_ms": round(median(stage_times[stage]) * 1000, 3) if stage_times[stage] else 0.0,
+                "peak_kb": round(max(stage_peaks[stage]), 1) if stage_peaks[stage] else 0.0,
+            }
+            for stage in STAGES
+        },
+    }
+
+def compare(report, baseline, accuracy_tolerance, latency_tolerance, min_latency_ms):
+    failures = []
+    for field in FIELDS:
+        for metric in ("precision", "recall"):
+            before = baseline["fields"].get(field, {}).get(metric)
+            after = report["fields"][field][metric]
+            if before is not None and before - after > accuracy_tolerance:
+                failures.append(f"{field} {metric} dropped {before:.4f} -> {after:.4f}")
+    for stage in STAGES:
+        before = baseline["stages"].get(stage, {}).get("median_ms")
+        after = report["stages"][stage]["median_ms"]
+        # Sub-millisecond stages are all noise, compare against a floor instead
+        if before is not None and after > max(before, min_latency_ms) * (1 + latency_tolerance / 100):
+            failures.append(f"{stage} latency regressed {before:.3f}ms -> {after:.3f}ms")
+    return failures
+
+def print_report(report):
+    print(f"documents: {report['documents']}")
+    if report["errors"]:
+        print(f"errors: {len(report['errors'])} ({', '.join(report['errors'])})")
+    print(f"{'field':<14}{'precision':>10}{'recall':>10}")
+    for field, metrics in report["fields"].items():
+        print(f"{field:<14}{metrics['precision']:>10.3f}{metrics['recall']:>10.3f}")
+    print(f"{'stage':<14}{'median ms':>10}{'peak KiB':>10}")
+    for stage, metrics in report["stages"].items():
+        print(f"{stage:<14}{metrics['median_ms']:>10.2f}{metrics['peak_kb']:>10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy and latency regression harness")
+    parser.add_argument("corpus_dir", help="directory of PDFs with golden .json files next to them")
+    parser.add_argument("--baseline", default=None,
+                        help="metrics file to compare against (default: <corpus_dir>/baseline.json)")
+    parser.add_argument("--write-baseline", action="store_true", help="save this run as the baseline")
+    parser.add_argument("--update-golden", action="store_true", help="overwrite golden files with current output")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per document (median is kept)")
+    parser.add_argument("--accuracy-tolerance", type=float, default=0.01,
+                        help="allowed absolute drop in precision/recall per field")
+    parser.add_argument("--latency-tolerance", type=float, default=20.0,
+                        help="allowed latency regression per stage, in percent")
+    parser.add_argument("--min-latency-ms", type=float, default=1.0,
+                        help="latency floor below which stage timings are not compared")
+    parser.add_argument("--profile", default=None, help="extraction profile to run the corpus with")
+    args = parser.parse_args()
+
+    baseline_path = args.baseline or os.path.join(args.corpus_dir, "baseline.json")
+    report = run_corpus(args.corpus_dir, max(1, args.repeat), args.update_golden, load_profile(args.profile))
+    if args.update_golden:
+        sys.exit(1 if report["errors"] else 0)
+
+    print_report(report)
+
+    if args.write_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {baseline_path}")
+        sys.exit(1 if report["errors"] else 0)
+
+    if not os.path.exists(baseline_path):
+        print(f"no baseline at {baseline_path}; run with --write-baseline first", file=sys.stderr)
+        sys.exit(0)
+
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    failures = compare(report, baseline, args.accuracy_tolerance, args.latency_tolerance, args.min_latency_ms)
+    failures += [f"{pdf} could not be parsed ({error})" for pdf, error in report["errors"].items()]
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
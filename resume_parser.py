@@ -0,0 +1,187 @@
+"""Library API: parse a resume in-process from a path or from its bytes.
+
+    from resume_parser import parse_resume, ParseOptions
+
+    result = parse_resume(pdf_bytes, fields=("name", "skills"),
+                          options=ParseOptions(profile="acme"))
+    result.name, result.skills, result.confidence["skills"], result.to_dict()
+
+Runs the stages parser.js runs (extract.py, name.py, the section extractors
+and extra.py) in the calling process: no subprocesses, no JSON round-trips
+and no temp file for PDFs held in memory. Safe to call from several threads:
+reading the PDF holds pdf_source.FITZ_LOCK, everything else works on
+per-call objects.
+"""
+import os
+import re
+import sys
+import json
+import argparse
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+from extract import OCR_DPI, extract_pdf_layout
+from prescreen import prescreen_pdf
+from profiles import load_profile
+from name import detect_name
+from extra import get_other_info
+from skills import SkillsExtractor
+from education import EducationExtractor
+from experience import ExperienceExtractor
+from projects import ProjectsExtractor
+from achievements import AchievementsExtractor
+
+SECTION_EXTRACTORS = {
+    "skills": SkillsExtractor,
+    "education": EducationExtractor,
+    "experience": ExperienceExtractor,
+    "projects": ProjectsExtractor,
+    "achievements": AchievementsExtractor,
+}
+FIELDS = ("name", "email", "phone") + tuple(SECTION_EXTRACTORS) + ("other_info",)
+
+# Same limits and review threshold as parser.js
+MAX_PAGES = int(os.environ.get("EXTRACT_MAX_PAGES", "40"))
+MAX_LINES = int(os.environ.get("EXTRACT_MAX_LINES", "5000"))
+OCR_MAX_PAGES = int(os.environ.get("OCR_MAX_PAGES", "5"))
+REVIEW_CONFIDENCE = float(os.environ.get("REVIEW_CONFIDENCE", "0.5"))
+REVIEW_FIELDS = ("name", "skills", "education", "experience")
+
+EMAIL_PATTERN = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+PHONE_PATTERN = re.compile(r"\b(?:\+?\d{1,3}[\s\-()]*)?(?:\(?\d{2,4}\)?[\s\-]*)?\d{3,4}[\s\-]?\d{4}\b")
+NOT_PHONE_CONTEXT = ("@", "http", "linkedin.com", "github.com")
+
+@dataclass
+class ParseOptions:
+    profile: Optional[str] = None       # extraction profile name (profiles/<name>.json)
+    ocr: bool = False                   # read text with Tesseract instead of the text layer
+    ocr_dpi: int = OCR_DPI
+    max_pages: Optional[int] = None     # None: MAX_PAGES, or OCR_MAX_PAGES with ocr
+    max_lines: Optional[int] = MAX_LINES
+    prescreen: bool = False             # screen first; rejected documents are not parsed
+
+@dataclass
+class ResumeResult:
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    skills: list = field(default_factory=list)
+    skill_ids: list = field(default_factory=list)
+    education: dict = field(default_factory=dict)
+    experience: dict = field(default_factory=dict)
+    projects: dict = field(default_factory=dict)
+    achievements: dict = field(default_factory=dict)
+    other_info: dict = field(default_factory=dict)
+    # Per field: 0..1 confidence and what it was based on (see sections.py)
+    confidence: dict = field(default_factory=dict)
+    evidence: dict = field(default_factory=dict)
+    needs_review: bool = False
+    low_confidence: list = field(default_factory=list)
+    locales: list = field(default_factory=list)
+    truncated: Optional[dict] = None
+    prescreen: Optional[dict] = None
+    error: Optional[str] = None
+
+    def to_dict(self):
+        return asdict(self)
+
+def find_contact(lines):
+    """(email, phone) from the document's lines, matched the way parser.js
+    does: over the non-empty lines joined into one text, and no phone at all
+    when that text holds an email address or a URL, so their digits aren't
+    taken for one"""
+    text = "\n".join(line for line in lines if line and line.strip()).strip()
+    match = EMAIL_PATTERN.search(text)
+    email = match.group(0) if match else None
+    phone = None
+    if not any(marker in text.lower() for marker in NOT_PHONE_CONTEXT):
+        match = PHONE_PATTERN.search(text)
+        phone = match.group(0) if match else None
+    return email, phone
+
+def parse_resume(source, fields=FIELDS, options=None):
+    """Parse a PDF given as a path or as bytes into a ResumeResult.
+
+    fields selects what to extract (any of FIELDS); fields left out keep
+    their empty defaults. other_info lists the blocks no section claimed, so
+    asking for it runs every section extractor. Raises ValueError for an
+    unknown field or profile; unreadable PDFs raise PyMuPDF's errors.
+    """
+    options = options or ParseOptions()
+    fields = set(fields)
+    unknown = fields.difference(FIELDS)
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+
+    profile = load_profile(options.profile)
+    result = ResumeResult()
+
+    if options.prescreen:
+        result.prescreen = prescreen_pdf(source, profile=profile)
+        if result.prescreen["verdict"] == "reject":
+            result.error = "Rejected by pre-screen: " + ", ".join(result.prescreen["reasons"])
+            return result
+
+    max_pages = options.max_pages
+    if max_pages is None:
+        max_pages = OCR_MAX_PAGES if options.ocr else MAX_PAGES
+    data, page_height, result.truncated, profile = extract_pdf_layout(
+        source, max_pages, options.max_lines, options.ocr, options.ocr_dpi, profile
+    )
+    result.locales = list(profile.locales)
+    if not data:
+        return result
+
+    if "name" in fields:
+        found = detect_name(data, page_height)
+        result.name = found["name"]
+        result.confidence["name"] = found["confidence"]
+        result.evidence["name"] = found["evidence"]
+    if "email" in fields or "phone" in fields:
+        email, phone = find_contact(item["text"] for item in data)
+        result.email = email if "email" in fields else None
+        result.phone = phone if "phone" in fields else None
+
+    used_blocks = set()
+    for key, extractor_cls in SECTION_EXTRACTORS.items():
+        if key not in fields and "other_info" not in fields:
+            continue
+        extractor = extractor_cls(profile=profile)
+        value = extractor.process_data(data)
+        used_blocks.update(extractor.evidence["blocks"])
+        if key in fields:
+            setattr(result, key, value)
+            result.confidence[key] = extractor.confidence
+            result.evidence[key] = extractor.evidence
+            if key == "skills":
+                result.skill_ids = extractor.skill_ids
+
+    if "other_info" in fields:
+        result.other_info = get_other_info(data, used_blocks).get("other_info", {})
+
+    result.low_confidence = [
+        key for key in REVIEW_FIELDS if key in result.confidence and result.confidence[key] < REVIEW_CONFIDENCE
+    ]
+    result.needs_review = bool(result.low_confidence)
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse a resume PDF in-process")
+    parser.add_argument("pdf_path", help="PDF file, or - to read the PDF from stdin")
+    parser.add_argument("--fields", default=",".join(FIELDS), help="comma-separated subset of: " + ", ".join(FIELDS))
+    parser.add_argument("--profile", default=None, help="extraction profile name")
+    parser.add_argument("--ocr", action="store_true")
+    parser.add_argument("--prescreen", action="store_true")
+    args = parser.parse_args()
+
+    source = sys.stdin.buffer.read() if args.pdf_path == "-" else args.pdf_path
+    try:
+        result = parse_resume(
+            source,
+            [f.strip() for f in args.fields.split(",") if f.strip()],
+            ParseOptions(profile=args.profile, ocr=args.ocr, prescreen=args.prescreen),
+        )
+    except (ValueError, RuntimeError) as e:
+        print(f"Parse failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result.to_dict(), ensure_ascii=False))
@@ -0,0 +1,63 @@
+from profiles import normalize_heading
+
+def starts_with_heading(texts, section_headings):
+    first = texts[0].strip() if texts else ''
+    heading = normalize_heading(first)
+    if heading in section_headings:
+        return True
+    # A short all-caps or colon-terminated line only counts when it names a
+    # section ("PROFESSIONAL EXPERIENCE"), not for content like "SQL, AWS"
+    if len(first.split()) <= 4 and (first.isupper() or first.endswith(':')):
+        return any(f" {known} " in f" {heading} " for known in section_headings)
+    return False
+
+def claim_blocks(blocks, heading_block_ids, section_headings):
+    """Return the heading blocks plus the continuation blocks that follow them.
+
+    extract_pdf_layout splits a section when it runs across a page or column
+    break; the piece after the break has no heading of its own, so it is
+    linked to the section directly before it. A block that starts with one
+    of section_headings (the profile's) is never treated as a continuation.
+    """
+    order = list(blocks)
+    heading_block_ids = set(heading_block_ids)
+    claimed = []
+    for i, block_id in enumerate(order):
+        if block_id in heading_block_ids:
+            claimed.append(block_id)
+        elif claimed and order[i - 1] == claimed[-1] and not starts_with_heading(blocks[block_id], section_headings):
+            claimed.append(block_id)
+    return claimed
+
+def claimed_texts(blocks, block_ids):
+    return [text for block_id in block_ids for text in blocks[block_id]]
+
+# How the section was located: an exact heading, a heading found by keyword
+# (fallback), content that looks like the section without any heading, or nothing
+MATCH_WEIGHTS = {"exact": 1.0, "fallback": 0.6, "content": 0.4, "none": 0.0}
+
+def section_evidence(data, match, heading_line, heading_block_ids, block_ids):
+    """What an extractor based its result on; line ids are indices into data"""
+    claimed = set(block_ids)
+    return {
+        "heading_match": match,
+        "heading": data[heading_line]['text'] if heading_line is not None else None,
+        "heading_line": heading_line,
+        "blocks": list(block_ids),
+        "continuation_blocks": [block_id for block_id in block_ids if block_id not in heading_block_ids],
+        "lines": [i for i, item in enumerate(data) if item.get('block', 0) in claimed],
+    }
+
+def section_confidence(data, evidence, items, structured_items):
+    """0..1 from how the section was found and how much of it parsed into
+    structured entries (dates, degrees, taxonomy skills, ...)"""
+    if not items:
+        return 0.0
+    score = MATCH_WEIGHTS[evidence["heading_match"]]
+    # A heading that opens its block was also picked out by the layout pass
+    heading_line = evidence["heading_line"]
+    if heading_line is not None and heading_line > 0 and \
+       data[heading_line - 1].get('block', 0) == data[heading_line].get('block', 0):
+        score *= 0.8
+    score *= 0.6 + 0.4 * min(structured_items, items) / items
+    return round(score, 2)
@@ -51,10 +51,19 @@ const express = require("express");
 const multer = require("multer");
 const path = require("path");
 const fs = require("fs");
+const crypto = require("crypto");
+const zlib = require("zlib");
+const { promisify } = require("util");
+const { PassThrough, Transform } = require("stream");
+const { pipeline } = require("stream/promises");
 const { v4: uuidv4 } = require("uuid");
-const AdmZip = require("adm-zip");
+const yauzl = require("yauzl");
 const parseResume = require("./parser");
+const { prescreenPdf, ParseError } = require("./parser");
 const convertDocToPdf = require("./utils/convertToPdf"); // you'll create this next
+const createResultStore = require("./utils/resultStore");
+const createWorkQueue = require("./utils/workQueue");
+const { parseJobDescription, normalizeSkills } = require("./utils/matchFeatures");
 
 
 const app = express();
@@ -66,7 +75,93 @@ if (!fs.existsSync(uploadDir)) fs.mkdirSync(uploadDir);
 app.use("/uploads", express.static("uploads"));
 app.use(express.static(path.join(__dirname, "public")));
 
-let latestResults = []; // store parsed results for display
+// Parsed results are kept in SQLite so they survive restarts and can be searched
+const store = createResultStore(process.env.RESULTS_DB || path.join(__dirname, "data", "resumes.db"));
+
+// Uploaded PDFs are kept for preview on the results page, then purged
+const UPLOAD_RETENTION_DAYS = Number(process.env.UPLOAD_RETENTION_DAYS || 30);
+const purgeOldUploads = () => {
+  const removed = store.purgeUploads(uploadDir, UPLOAD_RETENTION_DAYS * 24 * 60 * 60 * 1000);
+  if (removed) console.log(`🧹 Removed ${removed} upload(s) older than ${UPLOAD_RETENTION_DAYS} days`);
+};
+purgeOldUploads();
+setInterval(purgeOldUploads, 60 * 60 * 1000).unref();
+
+// Same candidate uploaded again (same email/phone or near-identical text):
+// "flag" stores it with a duplicateOf pointer, "merge" keeps only the earlier
+// copy and lists it under the new batch, "off" disables the check
+const DEDUP_MODE = process.env.DEDUP_MODE || "flag";
+const DEDUP_THRESHOLD = Number(process.env.DEDUP_THRESHOLD || 0.8);
+
+// Extraction profile per upload ("profile" form field); unset uses the
+// EXTRACTION_PROFILE env var or profiles/default.json
+const profilesDir = process.env.EXTRACTION_PROFILES || path.join(__dirname, "profiles");
+const profileExists = (name) =>
+  /^[A-Za-z0-9_-]+$/.test(name) &&
+  [".json", ".yaml", ".yml"].some((ext) => fs.existsSync(path.join(profilesDir, name + ext)));
+
+// Hashing and the pre-screen run on their own small queue, so a large ZIP
+// doesn't start a prescreen.py process for every document at once.
+// Pre-screened documents are parsed on independent queues so very long PDFs
+// and OCR of image-only scans never hold up ordinary resumes
+const screenQueue = createWorkQueue(Number(process.env.SCREEN_CONCURRENCY || 2));
+const parseQueue = createWorkQueue(Number(process.env.PARSE_CONCURRENCY || 2));
+const slowQueue = createWorkQueue(Number(process.env.SLOW_PARSE_CONCURRENCY || 1));
+const ocrQueue = createWorkQueue(Number(process.env.OCR_CONCURRENCY || 1));
+
+// A document whose parse times out, crashes or runs out of memory is retried
+// once on the slow queue; one that fails outright (a corrupt PDF) is not, as
+// it would fail the same way. After QUARANTINE_AFTER failures of either kind
+// its hash is quarantined and later uploads of the same bytes are not parsed
+const QUARANTINE_AFTER = Number(process.env.QUARANTINE_AFTER || 2);
+const SUPERVISED_ERRORS = ["timeout", "crash", "memory"];
+
+// Upload limits. Files stream to uploads/.incoming (express.static doesn't
+// serve dot-directories) and only accepted documents move into uploads/.
+const MB = 1024 * 1024;
+const MAX_FILE_BYTES = Number(process.env.MAX_UPLOAD_FILE_MB || 20) * MB;
+const MAX_REQUEST_BYTES = Number(process.env.MAX_UPLOAD_REQUEST_MB || 100) * MB;
+const UPLOAD_BUDGET_BYTES = Number(process.env.UPLOAD_BUDGET_MB || 500) * MB;
+const MAX_QUEUED_PARSES = Number(process.env.MAX_QUEUED_PARSES || 100);
+const DOCUMENT_EXTENSIONS = [".pdf", ".doc", ".docx"];
+
+const incomingDir = path.join(uploadDir, ".incoming");
+fs.rmSync(incomingDir, { recursive: true, force: true }); // leftovers from a previous run
+fs.mkdirSync(incomingDir, { recursive: true });
+
+// Bytes of uploads being received or processed, across all requests
+let inFlightBytes = 0;
+
+function reserveBytes(req, bytes) {
+  if (inFlightBytes + bytes > UPLOAD_BUDGET_BYTES) return false;
+  inFlightBytes += bytes;
+  req.reservedBytes = (req.reservedBytes || 0) + bytes;
+  return true;
+}
+
+// Turn uploads away before any of the body is read: 413 when the request is
+// too large, 429 when the parse queues are backed up, 503 when the in-flight
+// byte budget is spent. The reservation is released when the response
+// closes, i.e. after parsing or when the client goes away.
+function admitUpload(req, res, next) {
+  const length = Number(req.headers["content-length"]);
+  if (!length) return res.status(411).send("Content-Length required");
+  if (length > MAX_REQUEST_BYTES) return res.status(413).send("Upload too large");
+
+  if (screenQueue.size + parseQueue.size + slowQueue.size + ocrQueue.size >= MAX_QUEUED_PARSES) {
+    res.set("Retry-After", "30");
+    return res.status(429).send("Too many resumes waiting to be parsed, try again shortly");
+  }
+  if (!reserveBytes(req, length)) {
+    res.set("Retry-After", "30");
+    return res.status(503).send("Server is busy, try again shortly");
+  }
+  res.once("close", () => {
+    inFlightBytes -= req.reservedBytes;
+    req.reservedBytes = 0;
+  });
+  next();
+}
 
 // Serve index.html
 app.get("/", (req, res) => {
@@ -79,102 +174,258 @@ app.get("/results", (req, res) => {
 });
 
 // Serve results data for frontend
+// Query params: batch, name, email, skill, employer, q, review, page, limit
 app.get("/parsed-results", (req, res) => {
-  res.json({ results: latestResults });
+  res.json(store.queryResults(req.query));
 });
 
-// Bulk handler
-const upload = multer().fields([
+// Rank stored resumes against a job: { description, k } with optional
+// skills, minYears and minDegree overriding what is read from the description
+app.post("/match", express.json({ limit: "100kb" }), (req, res) => {
+  const body = req.body || {};
+  if (typeof body.description !== "string" && !Array.isArray(body.skills)) {
+    return res.status(400).send("A job description or a skills list is required");
+  }
+  const job = parseJobDescription(typeof body.description === "string" ? body.description : "");
+  if (Array.isArray(body.skills)) job.skills = normalizeSkills(body.skills);
+  if (body.minYears !== undefined) job.minYears = Number(body.minYears) || 0;
+  if (body.minDegree !== undefined) job.minDegree = Number(body.minDegree) || 0;
+
+  res.json({ job, results: store.matchResumes(job, body.k) });
+});
+
+// Bulk handler: files are streamed to temp files (never held in memory) and
+// moved into uploads/ once they are accepted
+const upload = multer({
+  storage: multer.diskStorage({
+    destination: incomingDir,
+    filename: (req, file, cb) => cb(null, `${uuidv4()}${path.extname(file.originalname).toLowerCase()}`),
+  }),
+  limits: { fileSize: MAX_FILE_BYTES, files: 21, fields: 10, fieldSize: 1024 },
+}).fields([
   { name: "files", maxCount: 20 },
   { name: "zip", maxCount: 1 }
 ]);
 
-app.post("/upload-resumes", upload, async (req, res) => {
-  const pdfBuffers = [];
+const receiveUpload = (req, res, next) => {
+  upload(req, res, (err) => {
+    if (!err) return next();
+    // multer has already removed the partial files
+    const status = err.code === "LIMIT_FILE_SIZE" ? 413 : 400;
+    res.status(status).send(`Upload rejected: ${err.message}`);
+  });
+};
+
+const hashFile = (filePath) =>
+  new Promise((resolve, reject) => {
+    const hash = crypto.createHash("sha256");
+    fs.createReadStream(filePath)
+      .on("error", reject)
+      .on("data", (chunk) => hash.update(chunk))
+      .on("end", () => resolve(hash.digest("hex")));
+  });
+
+// Run a parse on its queue, counting failures against the document's hash
+// and retrying supervised ones on the slow queue while under the limit
+async function runSupervised(sha256, filename, queue, task) {
+  for (;;) {
+    try {
+      return await queue.run(task);
+    } catch (err) {
+      if (!(err instanceof ParseError)) throw err;
+      const failures = store.recordFailure(sha256, filename, err);
+      if (!SUPERVISED_ERRORS.includes(err.code) || failures >= QUARANTINE_AFTER) throw err;
+      console.warn(`⚠️ ${filename}: ${err.message}, retrying on the slow queue`);
+      queue = slowQueue;
+    }
+  }
+}
 
-  // if (req.files.files) {
-  //   for (const file of req.files.files) {
-  //     pdfBuffers.push({ buffer: file.buffer, originalname: file.originalname });
-  //   }
-  // }
+// ZIPs are read entry by entry from disk. The sizes in an archive's headers
+// are not trusted: yauzl hands over the raw entry data, which is inflated
+// here through countBytes, and that aborts as soon as the bytes actually
+// written go over a limit.
+const openZip = promisify(yauzl.open);
+
+const nextEntry = (zip) =>
+  new Promise((resolve, reject) => {
+    const done = (fn) => (value) => {
+      zip.off("entry", onEntry).off("end", onEnd).off("error", onError);
+      fn(value);
+    };
+    const onEntry = done(resolve);
+    const onEnd = done(() => resolve(null));
+    const onError = done(reject);
+    zip.on("entry", onEntry).on("end", onEnd).on("error", onError);
+    zip.readEntry();
+  });
+
+// Pass-through that reports each chunk's size; check returns an error
+// message to abort the stream
+const countBytes = (check) =>
+  new Transform({
+    transform(chunk, encoding, callback) {
+      const message = check(chunk.length);
+      callback(message ? new Error(message) : null, message ? undefined : chunk);
+    },
+  });
+
+const removeFile = (filePath) =>
+  fs.promises.unlink(filePath).catch((err) => {
+    if (err.code !== "ENOENT") console.error("⚠️ Failed to delete file:", err.message);
+  });
+
+app.post("/upload-resumes", admitUpload, receiveUpload, async (req, res) => {
+  const documents = [];
+  const batchId = uuidv4();
+  const profile = req.body.profile || undefined;
+  const uploaded = [...((req.files && req.files.files) || []), ...((req.files && req.files.zip) || [])];
+
+  try {
+    if (profile && !profileExists(profile)) {
+      return res.status(400).send("Unknown extraction profile");
+    }
 
+    const saveError = (filename, error) =>
+      store.saveResult({ batchId, filename, storedName: null, data: { error } });
 
-  if (req.files.files) {
-  for (const file of req.files.files) {
-    const ext = path.extname(file.originalname).toLowerCase();
+    for (const file of (req.files && req.files.files) || []) {
+      const ext = path.extname(file.originalname).toLowerCase();
+      if (DOCUMENT_EXTENSIONS.includes(ext)) {
+        documents.push({ tempPath: file.path, originalname: file.originalname, ext });
+      }
+    }
 
-    if (ext === ".pdf") {
-      pdfBuffers.push({ buffer: file.buffer, originalname: file.originalname });
-    } else if (ext === ".doc" || ext === ".docx") {
+    // Entries are unpacked one at a time to temp files; the bytes inflated
+    // count against the same per-file, per-request and global limits
+    if (req.files && req.files.zip) {
+      let zip = null;
       try {
-        const converted = await convertDocToPdf(file.buffer);
-        pdfBuffers.push({ buffer: converted, originalname: file.originalname });
+        zip = await openZip(req.files.zip[0].path, { lazyEntries: true, autoClose: false, validateEntrySizes: false });
+        const openReadStream = promisify(zip.openReadStream.bind(zip));
+        let unpackedBytes = 0;
+
+        for (let entry = await nextEntry(zip); entry; entry = await nextEntry(zip)) {
+          if (entry.fileName.endsWith("/")) continue; // skip folders
+
+          const ext = path.extname(entry.fileName).toLowerCase();
+          if (!DOCUMENT_EXTENSIONS.includes(ext)) continue;
+
+          const tempPath = path.join(incomingDir, `${uuidv4()}${ext}`);
+          let entryBytes = 0;
+          try {
+            const compressed = entry.isCompressed();
+            await pipeline(
+              await openReadStream(entry, compressed ? { decompress: false } : {}),
+              compressed ? zlib.createInflateRaw() : new PassThrough(),
+              countBytes((bytes) => {
+                entryBytes += bytes;
+                unpackedBytes += bytes;
+                if (entryBytes > MAX_FILE_BYTES || unpackedBytes > MAX_REQUEST_BYTES) return "File too large";
+                if (!reserveBytes(req, bytes)) return "Server busy, upload this file again later";
+                return null;
+              }),
+              fs.createWriteStream(tempPath)
+            );
+            documents.push({ tempPath, originalname: entry.fileName, ext });
+          } catch (err) {
+            await removeFile(tempPath);
+            saveError(entry.fileName, err.message);
+          }
+        }
       } catch (err) {
-        latestResults.push({
-          filename: file.originalname,
-          storedName: null,
-          data: { error: "Conversion failed: " + err.message },
-        });
+        saveError(req.files.zip[0].originalname, "Invalid ZIP: " + err.message);
+      } finally {
+        if (zip) zip.close();
       }
     }
-  }
-}
-
 
-  // if (req.files.zip) {
-  //   const zip = new AdmZip(req.files.zip[0].buffer);
-  //   const zipEntries = zip.getEntries();
-
-  //   for (const entry of zipEntries) {
-  //     if (entry.entryName.toLowerCase().endsWith(".pdf")) {
-  //       pdfBuffers.push({ buffer: entry.getData(), originalname: entry.entryName });
-  //     }
-  //   }
-  // }
-
-  if (req.files.zip) {
-  const zip = new AdmZip(req.files.zip[0].buffer);
-  const zipEntries = zip.getEntries();
-
-  for (const entry of zipEntries) {
-    if (entry.isDirectory) continue; // skip folders
-
-    const ext = path.extname(entry.entryName).toLowerCase();
-    const buffer = entry.getData();
-
-    if (ext === ".pdf") {
-      pdfBuffers.push({ buffer, originalname: entry.entryName });
-    } else if (ext === ".doc" || ext === ".docx") {
+    // PDFs are renamed into uploads/, Word files are converted there
+    const pdfs = [];
+    for (const doc of documents) {
+      const filename = `${uuidv4()}.pdf`;
+      const filepath = path.join(uploadDir, filename);
       try {
-        const converted = await convertDocToPdf(buffer);
-        pdfBuffers.push({ buffer: converted, originalname: entry.entryName });
+        if (doc.ext === ".pdf") {
+          await fs.promises.rename(doc.tempPath, filepath);
+        } else {
+          const converted = await convertDocToPdf(await fs.promises.readFile(doc.tempPath));
+          await fs.promises.writeFile(filepath, converted);
+        }
+        pdfs.push({ filename, filepath, originalname: doc.originalname });
       } catch (err) {
-        latestResults.push({
-          filename: entry.entryName,
-          storedName: null,
-          data: { error: "Conversion failed: " + err.message },
-        });
+        saveError(doc.originalname, "Conversion failed: " + err.message);
       }
     }
-  }
-}
 
-  const results = [];
-  for (const pdf of pdfBuffers) {
-    const filename = `${uuidv4()}.pdf`;
-    const filepath = path.join(uploadDir, filename);
+    await Promise.all(pdfs.map(async ({ filename, filepath, originalname }) => {
+      const { sha256, quarantined, screen } = await screenQueue.run(async () => {
+        const sha256 = await hashFile(filepath);
+        if (store.failureCount(sha256) >= QUARANTINE_AFTER) return { sha256, quarantined: true };
+
+        // A pre-screen that hangs or crashes counts as a failure; the document
+        // is still parsed, on the slow queue
+        const screen = await prescreenPdf(filepath, { profile }).catch((err) => {
+          if (!(err instanceof ParseError)) throw err;
+          store.recordFailure(sha256, originalname, err);
+          return { verdict: "slow" };
+        });
+        return { sha256, screen };
+      });
+      if (quarantined) {
+        store.saveResult({
+          batchId,
+          filename: originalname,
+          storedName: filename,
+          data: { error: "Quarantined: parsing this document failed repeatedly", errorCode: "quarantined", sha256 },
+        });
+        return;
+      }
+      if (screen && screen.verdict === "reject") {
+        store.saveResult({
+          batchId,
+          filename: originalname,
+          storedName: filename,
+          data: { error: "Rejected by pre-screen: " + screen.reasons.join(", "), prescreen: screen },
+        });
+        return;
+      }
+      const verdict = screen ? screen.verdict : "accept";
+      const queue = verdict === "ocr" ? ocrQueue : verdict === "slow" ? slowQueue : parseQueue;
 
-    fs.writeFileSync(filepath, pdf.buffer);
-    try {
-      const parsed = await parseResume(filepath);
-      results.push({ filename: pdf.originalname, storedName: filename, data: parsed });
-    } catch (err) {
-      results.push({ filename: pdf.originalname, storedName: filename, data: { error: err.message } });
-    }
-  }
+      try {
+        const parsed = await runSupervised(sha256, originalname, queue, () =>
+          parseResume(filepath, { ocr: verdict === "ocr", profile })
+        );
+        // Extractors that were killed leave their fields empty; the document
+        // is kept but the failure still counts towards quarantine
+        const killed = ((parsed && parsed.errors) || []).find((error) => SUPERVISED_ERRORS.includes(error.code));
+        if (killed) store.recordFailure(sha256, originalname, killed);
+        else store.clearFailures(sha256);
+
+        const duplicate = parsed && DEDUP_MODE !== "off" ? store.findDuplicate(parsed, DEDUP_THRESHOLD) : null;
+
+        if (duplicate && DEDUP_MODE === "merge") {
+          store.mergeIntoBatch(duplicate.id, batchId);
+          await removeFile(filepath);
+          return;
+        }
+        if (duplicate) parsed.duplicateOf = duplicate;
+
+        store.saveResult({ batchId, filename: originalname, storedName: filename, data: parsed });
+      } catch (err) {
+        const data = err instanceof ParseError
+          ? { error: err.message, errorCode: err.code, stage: err.stage, sha256 }
+          : { error: err.message };
+        store.saveResult({ batchId, filename: originalname, storedName: filename, data });
+      }
+    }));
 
-  latestResults = results;
-  res.redirect("/results");
+    res.redirect(`/results?batch=${batchId}`);
+  } finally {
+    // Whatever was not moved into uploads/ (Word originals, ZIPs, rejects)
+    await Promise.all([...uploaded.map((file) => file.path), ...documents.map((doc) => doc.tempPath)].map(removeFile));
+  }
 });
 
 app.listen(port, () => {
@@ -1,25 +1,96 @@
+import os
 import sys
 import json
 import re
 from collections import defaultdict
+from sections import claim_blocks, claimed_texts, section_evidence, section_confidence
+from profiles import load_profile, profile_from_input
+from functools import lru_cache
+from limits import MEMORY_EXIT_CODE, apply_memory_limit, is_out_of_memory
+
+TAXONOMY_PATH = os.environ.get(
+    'SKILLS_TAXONOMY', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skills_taxonomy.json')
+)
+
+# Keeps symbols that belong to skill names together: c++, c#, node.js, .net
+TOKEN_PATTERN = re.compile(r'[a-z0-9+#]+(?:\.[a-z0-9+#]+)*|\.[a-z]+', re.IGNORECASE)
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+class SkillTaxonomy:
+    """Canonical skills indexed by a token trie built from their aliases.
+
+    Matching walks the trie once from each token and keeps the longest
+    alias, so a block is scanned in time linear in its token count (aliases
+    are at most a few tokens long).
+    """
+    def __init__(self, skills):
+        self.names = {}
+        self.trie = {}
+        for skill in skills:
+            self.names[skill['id']] = skill['name']
+            for alias in [skill['name']] + skill.get('aliases', []):
+                node = self.trie
+                for token in tokenize(alias):
+                    node = node.setdefault(token, {})
+                node[None] = skill['id']
+
+    def match_spans(self, text):
+        """(skill id, start, end) for every alias in text; start and end
+        are character offsets, so callers can tell what was left unmatched"""
+        spans = [(m.group(0).lower(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
+        found = []
+        i = 0
+        while i < len(spans):
+            node = self.trie
+            match_id, match_end = None, i
+            j = i
+            while j < len(spans) and spans[j][0] in node:
+                node = node[spans[j][0]]
+                j += 1
+                if None in node:
+                    match_id, match_end = node[None], j
+            if match_id is not None:
+                found.append((match_id, spans[i][1], spans[match_end - 1][2]))
+                i = match_end
+            else:
+                i += 1
+        return found
+
+    def match(self, text):
+        return [skill_id for skill_id, _, _ in self.match_spans(text)]
+
+@lru_cache(maxsize=None)
+def load_taxonomy(path=TAXONOMY_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return SkillTaxonomy(json.load(f)['skills'])
 
 class SkillsExtractor:
-    def __init__(self):
-        # More specific heading patterns that must match exactly
-        self.skill_headings = {
-            'skills', 'technical skills', 'technical expertise', 
-            'key skills', 'core competencies', 'technologies',
-            'tools', 'programming languages', 'technical proficiencies'
-        }
-        self.delimiters = r'[,;:/•\-–—|]|\s+and\s+|\s+or\s+|\s+'
-        self.date_pattern = re.compile(r'\b(?:\d{1,2}\s)?(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s\d{4}\b', re.IGNORECASE)
-        self.ignore_phrases = {
-            'employment history', 'education', 'hobbies', 
-            'extra-curricular activities', 'experience'
-        }
+    def __init__(self, taxonomy_path=TAXONOMY_PATH, profile=None):
+        self.taxonomy = load_taxonomy(taxonomy_path)
+        self.skill_ids = []
+        self.unmatched_skills = []
+        self.profile = profile or load_profile()
+        section = self.profile.sections['skills']
+        # Heading patterns that must match exactly
+        self.skill_headings = section.headings
+        self.delimiters = section.patterns['delimiters']
+        # What the taxonomy leaves of a line is only cut into whole listed
+        # pieces ("a, b; c"), never into single words
+        self.piece_delimiters = section.patterns['pieces']
+        self.label_pattern = section.patterns['label']
+        self.date_pattern = section.patterns['date']
+        self.ignore_phrases = section.ignore_phrases
+        self.fallback_keywords = section.fallback_keywords
+
+    def strip_skill(self, skill):
+        return re.sub(r'^[\s•\-*:]+|[\s•\-*:]+$', '', skill.strip())
 
     def clean_skill(self, skill):
-        skill = re.sub(r'^[\s•\-*:]+|[\s•\-*:]+$', '', skill.strip())
+        skill = self.strip_skill(skill)
         return ' '.join(
             word.capitalize() if not word.isupper() else word
             for word in skill.split()
@@ -37,69 +108,170 @@ class SkillsExtractor:
         return bool(self.date_pattern.match(text.strip()))
 
     def extract_skills_from_block(self, block_texts):
+        if self.taxonomy is None:
+            return self.split_skills_from_block(block_texts)
+
+        # Canonical ids in order of first mention, aliases folded together.
+        # A short listed piece the taxonomy matched nothing in is kept as
+        # written and listed in unmatched_skills without an id.
+        self.skill_ids = []
+        self.unmatched_skills = []
+        skills = []
+        seen_ids = set()
+        seen = set()
+        for line in block_texts:
+            if self.is_skill_heading(line) or self.is_date(line) or self.is_ignore_heading(line):
+                continue
+            spans = self.taxonomy.match_spans(line)
+            found = [(start, skill_id, None) for skill_id, start, _ in spans]
+            found.extend((start, None, skill) for start, skill in self.unmatched_pieces(line, spans))
+            for _, skill_id, skill in sorted(found, key=lambda entry: entry[0]):
+                if skill_id is not None:
+                    if skill_id in seen_ids:
+                        continue
+                    seen_ids.add(skill_id)
+                    self.skill_ids.append(skill_id)
+                    skill = self.taxonomy.names[skill_id]
+                elif skill.lower() in seen:
+                    continue
+                else:
+                    self.unmatched_skills.append(skill)
+                seen.add(skill.lower())
+                skills.append(skill)
+        return skills
+
+    def split_pieces(self, line):
+        """(offset, cleaned skill) for each delimiter-separated piece of line"""
+        pieces = []
+        start = 0
+        for match in list(self.delimiters.finditer(line)) + [None]:
+            end = match.start() if match else len(line)
+            piece = line[start:end].strip()
+            if piece and not self.is_date(piece) and len(piece) > 2:
+                cleaned = self.clean_skill(piece)
+                if cleaned and len(cleaned.split()) < 4:  # Skip long phrases
+                    pieces.append((start, cleaned))
+            if match:
+                start = match.end()
+        return pieces
+
+    def unmatched_pieces(self, line, spans):
+        """(offset, skill) for each listed piece of line that no taxonomy
+        span falls in, with any "Label:" prefix dropped and casing kept"""
+        pieces = []
+        start = 0
+        for match in list(self.piece_delimiters.finditer(line)) + [None]:
+            end = match.start() if match else len(line)
+            piece = line[start:end]
+            label = self.label_pattern.match(piece)
+            if label:
+                piece = piece[label.end():]
+            piece = self.strip_skill(piece)
+            matched = any(span_start < end and span_end > start for _, span_start, span_end in spans)
+            if not matched and len(piece) > 2 and len(piece.split()) < 4 and not self.is_date(piece):
+                pieces.append((start, piece))
+            if match:
+                start = match.end()
+        return pieces
+
+    def split_skills_from_block(self, block_texts):
+        """Delimiter-based fallback used when no taxonomy file is available"""
         cleaned_skills = []
+        seen = set()
         for line in block_texts:
             if self.is_skill_heading(line) or self.is_date(line) or self.is_ignore_heading(line):
                 continue
-            pieces = re.split(self.delimiters, line)
-            for piece in pieces:
-                piece = piece.strip()
-                if piece and not self.is_date(piece) and len(piece) > 2:
-                    cleaned = self.clean_skill(piece)
-                    if cleaned and len(cleaned.split()) < 4:  # Skip long phrases
-                        cleaned_skills.append(cleaned)
+            for _, cleaned in self.split_pieces(line):
+                if cleaned.lower() not in seen:
+                    seen.add(cleaned.lower())
+                    cleaned_skills.append(cleaned)
         return cleaned_skills
 
     def process_data(self, data):
         """Find the block with a skill heading and extract its contents"""
         blocks = defaultdict(list)
+        heading_block_ids = []
+        line_ids = defaultdict(list)
         self.skill_block_id = None
+        self.skill_block_ids = []
+        self.heading_match = "none"
+        self.heading_line = None
         
         # First pass: find all blocks and identify the skill block
-        for item in data:
+        for i, item in enumerate(data):
             block_id = item.get('block', 0)
             blocks[block_id].append(item['text'])
+            line_ids[block_id].append(i)
             # Check if this line is a skill heading
             if self.is_skill_heading(item['text']):
                 self.skill_block_id = block_id
+                self.heading_match = "exact"
+                if self.heading_line is None:
+                    self.heading_line = i
+                if block_id not in heading_block_ids:
+                    heading_block_ids.append(block_id)
 
         # Second pass: if no exact match, look for partial matches
         if self.skill_block_id is None:
             for block_id, texts in blocks.items():
-                for text in texts:
-                    if 'skill' in text.lower() and not any(ignore in text.lower() for ignore in self.ignore_phrases):
+                for j, text in enumerate(texts):
+                    text_lower = text.lower()
+                    if any(keyword in text_lower for keyword in self.fallback_keywords) and \
+                       not any(ignore in text_lower for ignore in self.ignore_phrases):
                         self.skill_block_id = block_id
+                        self.heading_match = "fallback"
+                        self.heading_line = line_ids[block_id][j]
                         break
                 if self.skill_block_id is not None:
                     break
 
         # If we found a skill block, extract its skills
         if self.skill_block_id is not None:
-            skills = self.extract_skills_from_block(blocks[self.skill_block_id])
+            self.skill_block_ids = claim_blocks(
+                blocks, heading_block_ids or [self.skill_block_id], self.profile.section_headings
+            )
+            skills = self.extract_skills_from_block(claimed_texts(blocks, self.skill_block_ids))
             # Filter out any remaining section headers that might have slipped through
-            return [s for s in skills if not self.is_ignore_heading(s)]
-        return []
+            skills = [s for s in skills if not self.is_ignore_heading(s)]
+            self.unmatched_skills = [s for s in self.unmatched_skills if not self.is_ignore_heading(s)]
+        else:
+            skills = []
+
+        # Only taxonomy matches count as structured; unmatched pieces lower it
+        self.evidence = section_evidence(
+            data, self.heading_match, self.heading_line, heading_block_ids, self.skill_block_ids
+        )
+        self.confidence = section_confidence(
+            data, self.evidence, len(skills), len(self.skill_ids) if self.taxonomy else 0
+        )
+        return skills
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python skills.py '<json_string>'", file=sys.stderr)
+        print("Usage: python skills.py '<json_string>' (or - to read it from stdin)", file=sys.stderr)
         sys.exit(1)
 
+    apply_memory_limit()
     try:
-        input_data = json.loads(sys.argv[1])
+        input_data = json.loads(sys.stdin.read() if sys.argv[1] == "-" else sys.argv[1])
         data = input_data['data'] if isinstance(input_data, dict) and 'data' in input_data else input_data
 
-        extractor = SkillsExtractor()
+        profile = profile_from_input(input_data)
+        extractor = SkillsExtractor(profile=profile)
         skills = extractor.process_data(data)
 
         # Output a valid JSON list of skills
         # Final result with one used block ID
         result = {
             "skills": skills,
-            "used_block": extractor.skill_block_id  # This is an integer or None
+            "skill_ids": extractor.skill_ids,
+            "unmatched_skills": extractor.unmatched_skills,
+            "used_blocks": extractor.skill_block_ids,
+            "confidence": extractor.confidence,
+            "evidence": extractor.evidence
         }
         print(json.dumps(result))
 
     except Exception as e:
         print(f"Error processing skills: {str(e)}", file=sys.stderr)
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(MEMORY_EXIT_CODE if is_out_of_memory(e) else 1)
\ No newline at end of file
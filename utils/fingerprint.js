@@ -0,0 +1,63 @@
+// MinHash fingerprints for near-duplicate resume detection.
+// The signature is split into LSH bands; two documents that share any band key
+// are candidates, and the fraction of equal signature slots estimates their
+// Jaccard similarity over word shingles.
+
+const NUM_HASHES = 64;
+const ROWS_PER_BAND = 4; // 16 bands: ~0.8 similarity has a >99% chance of sharing a band
+const SHINGLE_SIZE = 3;
+
+function fnv1a(str) {
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < str.length; i++) {
+    hash ^= str.charCodeAt(i);
+    hash = Math.imul(hash, 0x01000193);
+  }
+  return hash >>> 0;
+}
+
+// murmur3 finalizer; seeded to derive NUM_HASHES independent hash functions
+function mix(x, seed) {
+  let h = (x ^ seed) >>> 0;
+  h = Math.imul(h ^ (h >>> 16), 0x85ebca6b);
+  h = Math.imul(h ^ (h >>> 13), 0xc2b2ae35);
+  return (h ^ (h >>> 16)) >>> 0;
+}
+
+const SEEDS = Array.from({ length: NUM_HASHES }, (_, i) => mix(i + 1, 0x9e3779b9));
+
+function textFingerprint(text) {
+  const words = String(text || "").toLowerCase().match(/[a-z0-9]+/g) || [];
+  if (!words.length) return null;
+
+  const shingles = new Set();
+  const size = Math.min(SHINGLE_SIZE, words.length);
+  for (let i = 0; i + size <= words.length; i++) {
+    shingles.add(fnv1a(words.slice(i, i + size).join(" ")));
+  }
+
+  const signature = new Array(NUM_HASHES).fill(0xffffffff);
+  for (const shingle of shingles) {
+    for (let i = 0; i < NUM_HASHES; i++) {
+      const h = mix(shingle, SEEDS[i]);
+      if (h < signature[i]) signature[i] = h;
+    }
+  }
+
+  const bands = [];
+  for (let b = 0; b < NUM_HASHES / ROWS_PER_BAND; b++) {
+    const rows = signature.slice(b * ROWS_PER_BAND, (b + 1) * ROWS_PER_BAND).join(",");
+    bands.push(`${b}:${fnv1a(rows).toString(16)}`);
+  }
+  return { signature, bands };
+}
+
+function estimateSimilarity(a, b) {
+  let same = 0;
+  for (let i = 0; i < NUM_HASHES; i++) {
+    if (a[i] === b[i]) same++;
+  }
+  return same / NUM_HASHES;
+}
+
+module.exports = { textFingerprint, estimateSimilarity };
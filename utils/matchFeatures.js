@@ -0,0 +1,169 @@
+// Features for job matching: normalized skills, experience tenure and the
+// highest degree of a parsed resume, and the same terms read from a job
+// description. The store keeps them per resume at save time (see
+// resultStore.js matchResumes).
+const fs = require("fs");
+const path = require("path");
+
+const TAXONOMY_PATH = process.env.SKILLS_TAXONOMY || path.join(__dirname, "..", "skills_taxonomy.json");
+
+// Same tokenizer as skills.py, so aliases match the way they do there
+const TOKEN_PATTERN = /[a-z0-9+#]+(?:\.[a-z0-9+#]+)*|\.[a-z]+/gi;
+
+// Aliases that are also everyday words; in job description prose they only
+// count when capitalized ("Go", "REST", "C"), not in "go live" or "at rest"
+const PROSE_AMBIGUOUS = new Set(["c", "r", "go", "rest", "express", "spring", "swift", "spark", "ruby", "rust", "ts", "dl"]);
+
+let taxonomy = null;
+
+// Token trie over every alias, built once (mirrors skills.py SkillTaxonomy)
+function loadTaxonomy() {
+  if (taxonomy) return taxonomy;
+  const { skills } = JSON.parse(fs.readFileSync(TAXONOMY_PATH, "utf8"));
+  const trie = new Map();
+  for (const skill of skills) {
+    for (const alias of [skill.name, ...(skill.aliases || [])]) {
+      let node = trie;
+      const tokens = alias.toLowerCase().match(TOKEN_PATTERN) || [];
+      for (const token of tokens) {
+        if (!node.has(token)) node.set(token, new Map());
+        node = node.get(token);
+      }
+      node.set(null, { name: skill.name.toLowerCase(), single: tokens.length === 1 });
+    }
+  }
+  taxonomy = trie;
+  return taxonomy;
+}
+
+// Lowercased canonical skill names mentioned in text, longest alias first.
+// prose: false for skill lists, where "go" or "rest" can only mean the skill
+function matchSkills(text, { prose = true } = {}) {
+  const trie = loadTaxonomy();
+  const original = String(text || "").match(TOKEN_PATTERN) || [];
+  const tokens = original.map((token) => token.toLowerCase());
+  const found = new Set();
+  let i = 0;
+  while (i < tokens.length) {
+    let node = trie;
+    let match = null;
+    let end = i;
+    for (let j = i; j < tokens.length && node.has(tokens[j]); j++) {
+      node = node.get(tokens[j]);
+      if (node.has(null)) {
+        match = node.get(null);
+        end = j + 1;
+      }
+    }
+    const ambiguous = prose && match && match.single && PROSE_AMBIGUOUS.has(tokens[i]) && original[i] === tokens[i];
+    if (match && !ambiguous) {
+      found.add(match.name);
+      i = end;
+    } else {
+      i += 1;
+    }
+  }
+  return [...found];
+}
+
+// Month prefixes of the languages with profile locales (profiles/locales)
+const MONTH_PREFIXES = [
+  ["jan", 0], ["ene", 0], ["feb", 1], ["fév", 1], ["fev", 1], ["mar", 2], ["mär", 2], ["apr", 3],
+  ["avr", 3], ["abr", 3], ["may", 4], ["mai", 4], ["juin", 5], ["jun", 5], ["juil", 6], ["jul", 6],
+  ["aug", 7], ["aoû", 7], ["ago", 7], ["sep", 8], ["oct", 9], ["okt", 9], ["nov", 10], ["dec", 11],
+  ["dez", 11], ["déc", 11], ["dic", 11],
+];
+const DATE_PATTERN = /(?:(\p{L}+)\.?\s+|(\d{1,2})[/.])?((?:19|20)\d{2})/gu;
+const PRESENT_PATTERN = /(?<!\p{L})(?:present|current|now|today|heute|aktuell|jetzt|actuel|présent|aujourd'hui|actualidad|presente|hoy)(?!\p{L})/iu;
+
+const monthOf = (word) => {
+  const lower = word.toLowerCase();
+  const entry = MONTH_PREFIXES.find(([prefix]) => lower.startsWith(prefix));
+  return entry ? entry[1] : null;
+};
+
+// "Mar 2017 - Dec 2019" / "03/2017 - heute" / "2013 - 2017" -> [startMonth, endMonth]
+// counted in months since year 0; a bare year starts or ends in January
+function dateSpan(dates, now) {
+  const points = [];
+  for (const [, word, number, year] of String(dates).matchAll(DATE_PATTERN)) {
+    const month = word ? monthOf(word) : number ? Number(number) - 1 : null;
+    points.push(Number(year) * 12 + (month !== null && month >= 0 && month < 12 ? month : 0));
+  }
+  if (!points.length) return null;
+  const end = PRESENT_PATTERN.test(dates) ? now.getFullYear() * 12 + now.getMonth() : points[points.length - 1];
+  return end >= points[0] ? [points[0], end] : null;
+}
+
+// Years of experience: the union of the dated spans, so overlapping jobs count once
+function tenureYears(experience, now = new Date()) {
+  const spans = Object.values(experience || {})
+    .map((entry) => entry && entry.dates && dateSpan(entry.dates, now))
+    .filter(Boolean)
+    .sort((a, b) => a[0] - b[0]);
+
+  let months = 0;
+  let current = null;
+  for (const [start, end] of spans) {
+    if (current && start <= current[1]) {
+      current[1] = Math.max(current[1], end);
+    } else {
+      if (current) months += current[1] - current[0];
+      current = [start, end];
+    }
+  }
+  if (current) months += current[1] - current[0];
+  return Math.round((months / 12) * 10) / 10;
+}
+
+// 1 associate/diploma, 2 bachelor, 3 master, 4 doctorate
+const DEGREE_LEVELS = [
+  [4, /\b(?:ph\.?\s?d|doctor(?:ate)?|doktor|doctorat|doctorado)\b/i],
+  [3, /\b(?:m\.\s?(?:sc|s|a|tech|eng|phil)\b\.?|m\.?(?:sc|tech|eng|phil)\b|master|mba|máster|diplom)\b/i],
+  [2, /\b(?:b\.\s?(?:sc|s|a|e|tech|eng|com)\b\.?|b\.?(?:sc|tech|eng|com)\b|bachelor|licence|licenciatura|grado)/i],
+  [1, /\b(?:associate|diploma)\b/i],
+];
+
+const degreeLevels = (text) => DEGREE_LEVELS.filter(([, pattern]) => pattern.test(text)).map(([level]) => level);
+
+// Highest degree named in the education entries, 0 when none is recognised
+function degreeLevel(education) {
+  const text = Object.values(education || {})
+    .map((entry) => ((entry && entry.details) || []).join(" "))
+    .join("\n");
+  return Math.max(0, ...degreeLevels(text));
+}
+
+const YEARS_PATTERN = /(\d{1,2})\s*\+?\s*(?:years?|yrs?|jahre|ans|años)/i;
+
+// Skills listed explicitly; names outside the taxonomy are kept as written
+const normalizeSkills = (skills) => [
+  ...new Set(
+    skills.flatMap((skill) => {
+      const matched = matchSkills(String(skill), { prose: false });
+      return matched.length ? matched : [String(skill).trim().toLowerCase()];
+    }).filter(Boolean)
+  ),
+];
+
+// What a job description asks for: skills, minimum years, minimum degree
+// ("Bachelor's required, Master's preferred" asks for a bachelor)
+function parseJobDescription(text) {
+  const years = String(text || "").match(YEARS_PATTERN);
+  const levels = degreeLevels(String(text || ""));
+  return {
+    skills: matchSkills(text),
+    minYears: years ? Number(years[1]) : 0,
+    minDegree: levels.length ? Math.min(...levels) : 0,
+  };
+}
+
+// Stored per resume at save time; the skills themselves live in resume_skills
+function resumeFeatures(parsed) {
+  return {
+    tenureYears: tenureYears(parsed.experience),
+    degreeLevel: degreeLevel(parsed.education),
+  };
+}
+
+module.exports = { matchSkills, normalizeSkills, tenureYears, degreeLevel, parseJobDescription, resumeFeatures };
@@ -0,0 +1,433 @@
+const fs = require("fs");
+const path = require("path");
+const Database = require("better-sqlite3");
+const { estimateSimilarity } = require("./fingerprint");
+const { resumeFeatures } = require("./matchFeatures");
+
+const SCHEMA = `
+  CREATE TABLE IF NOT EXISTS resumes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch_id TEXT,
+    filename TEXT NOT NULL,
+    stored_name TEXT,
+    name TEXT COLLATE NOCASE,
+    email TEXT,
+    phone TEXT,
+    data TEXT NOT NULL,
+    created_at INTEGER NOT NULL
+  );
+  CREATE INDEX IF NOT EXISTS idx_resumes_name ON resumes(name);
+  CREATE INDEX IF NOT EXISTS idx_resumes_email ON resumes(email);
+  CREATE INDEX IF NOT EXISTS idx_resumes_phone ON resumes(phone);
+  CREATE INDEX IF NOT EXISTS idx_resumes_batch ON resumes(batch_id);
+  CREATE INDEX IF NOT EXISTS idx_resumes_created ON resumes(created_at);
+
+  -- Batches a resume is listed under: the one it was uploaded in plus any
+  -- later batch a duplicate upload was merged into
+  CREATE TABLE IF NOT EXISTS batch_members (
+    batch_id TEXT NOT NULL,
+    resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+    PRIMARY KEY (batch_id, resume_id)
+  ) WITHOUT ROWID;
+
+  CREATE TABLE IF NOT EXISTS resume_skills (
+    skill TEXT NOT NULL,
+    resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+    PRIMARY KEY (skill, resume_id)
+  ) WITHOUT ROWID;
+
+  -- Employers are searched through the employers column of resumes_fts;
+  -- the separate table earlier versions wrote was never read
+  DROP TABLE IF EXISTS resume_employers;
+
+  CREATE VIRTUAL TABLE IF NOT EXISTS resumes_fts USING fts5(name, skills, employers, body);
+
+  -- MinHash signature per resume and its LSH band keys (see utils/fingerprint.js)
+  CREATE TABLE IF NOT EXISTS resume_signatures (
+    resume_id INTEGER PRIMARY KEY REFERENCES resumes(id) ON DELETE CASCADE,
+    signature TEXT NOT NULL
+  );
+  CREATE TABLE IF NOT EXISTS resume_lsh (
+    band_key TEXT NOT NULL,
+    resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+    PRIMARY KEY (band_key, resume_id)
+  ) WITHOUT ROWID;
+
+  -- Job-matching features (see utils/matchFeatures.js); with resume_skills as
+  -- the inverted index they form each resume's sparse feature vector
+  CREATE TABLE IF NOT EXISTS resume_features (
+    resume_id INTEGER PRIMARY KEY REFERENCES resumes(id) ON DELETE CASCADE,
+    skill_count INTEGER NOT NULL,
+    tenure_years REAL NOT NULL,
+    degree_level INTEGER NOT NULL
+  );
+
+  -- Documents whose parse timed out, crashed or ran out of memory, by content
+  -- hash, so a file that keeps failing is turned away instead of retried
+  CREATE TABLE IF NOT EXISTS quarantine (
+    sha256 TEXT PRIMARY KEY,
+    filename TEXT,
+    failures INTEGER NOT NULL,
+    last_error TEXT,
+    updated_at INTEGER NOT NULL
+  );
+`;
+
+const MAX_PAGE_SIZE = 100;
+const MAX_LSH_CANDIDATES = 20;
+
+// Job matching: BM25 over the skill terms, plus a bonus for meeting the
+// job's years of experience (scaled, up to TENURE_WEIGHT) and degree
+const BM25_K1 = 1.2;
+const BM25_B = 0.75;
+const TENURE_WEIGHT = Number(process.env.MATCH_TENURE_WEIGHT || 1);
+const DEGREE_WEIGHT = Number(process.env.MATCH_DEGREE_WEIGHT || 1);
+const MAX_MATCHES = 100;
+
+// "Senior Engineer at Acme Corp" -> "acme corp"; falls back to the whole headline
+function employerOf(entry) {
+  const headline = entry.position || (entry.details && entry.details[0]) || "";
+  const match = headline.match(/(?:\bat\b|@)\s+(.+)$/i);
+  return (match ? match[1] : headline).trim().toLowerCase();
+}
+
+function flattenText(value, out = []) {
+  if (value == null) return out;
+  if (typeof value === "string") out.push(value);
+  else if (Array.isArray(value)) value.forEach((v) => flattenText(v, out));
+  else if (typeof value === "object") Object.values(value).forEach((v) => flattenText(v, out));
+  return out;
+}
+
+// Quote every token so user input can't inject FTS5 query syntax
+function ftsPhrase(text) {
+  return String(text)
+    .split(/\s+/)
+    .filter(Boolean)
+    .map((token) => `"${token.replace(/"/g, '""')}"`)
+    .join(" ");
+}
+
+const normalizeEmail = (email) => (email ? email.toLowerCase() : null);
+const normalizePhone = (phone) => (phone ? phone.replace(/[^\d+]/g, "") : null);
+
+function createResultStore(dbPath) {
+  fs.mkdirSync(path.dirname(dbPath), { recursive: true });
+  const db = new Database(dbPath);
+  db.pragma("journal_mode = WAL");
+  db.pragma("foreign_keys = ON");
+  db.exec(SCHEMA);
+
+  const insertResume = db.prepare(`
+    INSERT INTO resumes (batch_id, filename, stored_name, name, email, phone, data, created_at)
+    VALUES (@batchId, @filename, @storedName, @name, @email, @phone, @data, @createdAt)
+  `);
+  const insertSkill = db.prepare("INSERT OR IGNORE INTO resume_skills (skill, resume_id) VALUES (?, ?)");
+  const insertFts = db.prepare(
+    "INSERT INTO resumes_fts (rowid, name, skills, employers, body) VALUES (?, ?, ?, ?, ?)"
+  );
+  const insertSignature = db.prepare("INSERT INTO resume_signatures (resume_id, signature) VALUES (?, ?)");
+  const insertBand = db.prepare("INSERT OR IGNORE INTO resume_lsh (band_key, resume_id) VALUES (?, ?)");
+  const findByEmail = db.prepare("SELECT id, filename FROM resumes WHERE email = ? ORDER BY id LIMIT 1");
+  const findByPhone = db.prepare("SELECT id, filename FROM resumes WHERE phone = ? ORDER BY id LIMIT 1");
+  const getSignature = db.prepare(
+    "SELECT r.id, r.filename, s.signature FROM resume_signatures s JOIN resumes r ON r.id = s.resume_id WHERE s.resume_id = ?"
+  );
+  const insertFeatures = db.prepare(
+    "INSERT OR REPLACE INTO resume_features (resume_id, skill_count, tenure_years, degree_level) VALUES (?, ?, ?, ?)"
+  );
+  const insertMember = db.prepare("INSERT OR IGNORE INTO batch_members (batch_id, resume_id) VALUES (?, ?)");
+  const getFailures = db.prepare("SELECT failures FROM quarantine WHERE sha256 = ?");
+  const upsertFailure = db.prepare(`
+    INSERT INTO quarantine (sha256, filename, failures, last_error, updated_at) VALUES (?, ?, 1, ?, ?)
+    ON CONFLICT(sha256) DO UPDATE SET
+      failures = failures + 1, filename = excluded.filename,
+      last_error = excluded.last_error, updated_at = excluded.updated_at
+  `);
+  const deleteFailures = db.prepare("DELETE FROM quarantine WHERE sha256 = ?");
+  const expireUploads = db.prepare(
+    "UPDATE resumes SET stored_name = NULL WHERE stored_name IS NOT NULL AND created_at < ?"
+  );
+
+  const saveResult = db.transaction(({ batchId, filename, storedName, data }) => {
+    const { fingerprint, ...parsed } = data || {};
+    const skills = [...new Set((parsed.skills || []).map((s) => String(s).toLowerCase()))];
+    const employers = [
+      ...new Set(Object.values(parsed.experience || {}).map(employerOf).filter(Boolean)),
+    ];
+
+    const { lastInsertRowid: id } = insertResume.run({
+      batchId,
+      filename,
+      storedName,
+      name: parsed.name || null,
+      email: normalizeEmail(parsed.email),
+      phone: normalizePhone(parsed.phone),
+      data: JSON.stringify(parsed),
+      createdAt: Date.now(),
+    });
+    if (batchId) insertMember.run(batchId, id);
+    skills.forEach((skill) => insertSkill.run(skill, id));
+    insertFts.run(
+      id,
+      parsed.name || "",
+      skills.join(" "),
+      employers.join(" "),
+      flattenText([parsed.education, parsed.experience, parsed.projects, parsed.achievements]).join(" ")
+    );
+    if (fingerprint) {
+      insertSignature.run(id, JSON.stringify(fingerprint.signature));
+      fingerprint.bands.forEach((band) => insertBand.run(band, id));
+    }
+    const features = resumeFeatures(parsed);
+    insertFeatures.run(id, skills.length, features.tenureYears, features.degreeLevel);
+    return id;
+  });
+
+  // Resumes stored before job matching existed get their features once
+  const backfillFeatures = db.transaction(() => {
+    const rows = db
+      .prepare(
+        `SELECT r.id, r.data, (SELECT COUNT(*) FROM resume_skills s WHERE s.resume_id = r.id) AS skill_count
+         FROM resumes r WHERE r.id NOT IN (SELECT resume_id FROM resume_features)`
+      )
+      .all();
+    for (const row of rows) {
+      const features = resumeFeatures(JSON.parse(row.data));
+      insertFeatures.run(row.id, row.skill_count, features.tenureYears, features.degreeLevel);
+    }
+  });
+  backfillFeatures();
+
+  // Resumes stored before batch_members existed are listed under their own batch
+  db.exec(`
+    INSERT OR IGNORE INTO batch_members (batch_id, resume_id)
+    SELECT batch_id, id FROM resumes
+    WHERE batch_id IS NOT NULL AND id NOT IN (SELECT resume_id FROM batch_members)
+  `);
+
+  // Earlier resume of the same candidate: exact email/phone match first, then
+  // near-identical text through the LSH bands. Returns null when none is found.
+  function findDuplicate(data, threshold) {
+    const email = normalizeEmail(data.email);
+    const byEmail = email && findByEmail.get(email);
+    if (byEmail) return { id: byEmail.id, filename: byEmail.filename, matchedOn: "email" };
+
+    const phone = normalizePhone(data.phone);
+    const byPhone = phone && phone.length >= 7 && findByPhone.get(phone);
+    if (byPhone) return { id: byPhone.id, filename: byPhone.filename, matchedOn: "phone" };
+
+    const fingerprint = data.fingerprint;
+    if (!fingerprint) return null;
+
+    // Only resumes sharing a band are compared, so lookups don't scan the store
+    const candidates = db
+      .prepare(
+        `SELECT resume_id, COUNT(*) AS shared FROM resume_lsh
+         WHERE band_key IN (${fingerprint.bands.map(() => "?").join(",")})
+         GROUP BY resume_id ORDER BY shared DESC LIMIT ?`
+      )
+      .all(...fingerprint.bands, MAX_LSH_CANDIDATES);
+
+    let best = null;
+    for (const { resume_id: resumeId } of candidates) {
+      const row = getSignature.get(resumeId);
+      if (!row) continue;
+      const similarity = estimateSimilarity(fingerprint.signature, JSON.parse(row.signature));
+      if (similarity >= threshold && (!best || similarity > best.similarity)) {
+        best = { id: row.id, filename: row.filename, matchedOn: "text", similarity };
+      }
+    }
+    return best;
+  }
+
+  // Merging keeps the stored resume and also lists it under the new batch;
+  // it stays in the batch it was uploaded in
+  function mergeIntoBatch(resumeId, batchId) {
+    insertMember.run(batchId, resumeId);
+  }
+
+  // Filters: batch, name (prefix), email, skill, employer, q (full text),
+  // review (1: only results parseResume flagged needsReview); page is 1-based
+  function queryResults(filters = {}) {
+    const where = [];
+    const params = [];
+
+    if (filters.batch) {
+      where.push("r.id IN (SELECT resume_id FROM batch_members WHERE batch_id = ?)");
+      params.push(filters.batch);
+    }
+    if (filters.name) {
+      where.push("r.name LIKE ?");
+      params.push(`${filters.name.replace(/[%_]/g, "")}%`);
+    }
+    if (filters.email) {
+      where.push("r.email = ?");
+      params.push(filters.email.toLowerCase());
+    }
+    if (filters.skill) {
+      where.push("r.id IN (SELECT resume_id FROM resume_skills WHERE skill = ?)");
+      params.push(filters.skill.toLowerCase());
+    }
+    if (filters.employer) {
+      where.push("r.id IN (SELECT rowid FROM resumes_fts WHERE resumes_fts MATCH ?)");
+      params.push(`employers : (${ftsPhrase(filters.employer)})`);
+    }
+    if (filters.review === "1") {
+      where.push("json_extract(r.data, '$.needsReview') = 1");
+    }
+    if (filters.q && ftsPhrase(filters.q)) {
+      where.push("r.id IN (SELECT rowid FROM resumes_fts WHERE resumes_fts MATCH ?)");
+      params.push(ftsPhrase(filters.q));
+    }
+
+    const limit = Math.min(Math.max(parseInt(filters.limit, 10) || 20, 1), MAX_PAGE_SIZE);
+    const page = Math.max(parseInt(filters.page, 10) || 1, 1);
+    const whereSql = where.length ? `WHERE ${where.join(" AND ")}` : "";
+
+    const { total } = db.prepare(`SELECT COUNT(*) AS total FROM resumes r ${whereSql}`).get(...params);
+    const rows = db
+      .prepare(
+        `SELECT r.id, r.filename, r.stored_name, r.data, r.created_at FROM resumes r ${whereSql}
+         ORDER BY r.created_at DESC, r.id DESC LIMIT ? OFFSET ?`
+      )
+      .all(...params, limit, (page - 1) * limit);
+
+    return {
+      results: rows.map((row) => ({
+        id: row.id,
+        filename: row.filename,
+        storedName: row.stored_name,
+        createdAt: row.created_at,
+        data: JSON.parse(row.data),
+      })),
+      page,
+      limit,
+      total,
+    };
+  }
+
+  // Top-K resumes for a job ({ skills, minYears, minDegree } from
+  // matchFeatures.parseJobDescription). Only resumes sharing a skill with the
+  // job are scored, each through the resume_skills index, so a query touches
+  // the postings of the job's skills rather than every stored resume.
+  function matchResumes(job, k = 20) {
+    const skills = [...new Set((job.skills || []).map((s) => String(s).toLowerCase()))];
+    const limit = Math.min(Math.max(parseInt(k, 10) || 20, 1), MAX_MATCHES);
+    if (!skills.length) return [];
+
+    const { n, avgSkills } = db
+      .prepare("SELECT COUNT(*) AS n, AVG(skill_count) AS avgSkills FROM resume_features")
+      .get();
+    if (!n) return [];
+    const documentFrequency = db.prepare("SELECT COUNT(*) AS df FROM resume_skills WHERE skill = ?");
+    const terms = skills.map((skill) => {
+      const { df } = documentFrequency.get(skill);
+      return [skill, Math.log(1 + (n - df + 0.5) / (df + 0.5))];
+    });
+
+    const minYears = Number(job.minYears) || 0;
+    const rows = db
+      .prepare(
+        `WITH q(skill, idf) AS (
+           SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(@terms)
+         ),
+         scored AS (
+           SELECT f.resume_id, f.tenure_years, f.degree_level,
+                  SUM(q.idf * (@k1 + 1) / (1 + @k1 * (1 - @b + @b * f.skill_count * 1.0 / @avgSkills))) AS skill_score
+           FROM q
+           JOIN resume_skills s ON s.skill = q.skill
+           JOIN resume_features f ON f.resume_id = s.resume_id
+           GROUP BY f.resume_id
+         ),
+         top AS (
+           SELECT *, skill_score
+                  + (CASE WHEN @minYears > 0 THEN @tenureWeight * MIN(tenure_years / @minYears, 1.0) ELSE 0 END)
+                  + (CASE WHEN @minDegree > 0 AND degree_level >= @minDegree THEN @degreeWeight ELSE 0 END) AS score
+           FROM scored ORDER BY score DESC, resume_id DESC LIMIT @limit
+         )
+         SELECT top.*, r.filename, r.stored_name, r.name, r.email, r.batch_id,
+                (SELECT group_concat(q.skill, '|') FROM q WHERE EXISTS (
+                   SELECT 1 FROM resume_skills s WHERE s.skill = q.skill AND s.resume_id = top.resume_id
+                 )) AS matched
+         FROM top JOIN resumes r ON r.id = top.resume_id
+         ORDER BY top.score DESC, top.resume_id DESC`
+      )
+      .all({
+        terms: JSON.stringify(terms),
+        k1: BM25_K1,
+        b: BM25_B,
+        avgSkills: avgSkills || 1,
+        minYears,
+        minDegree: Number(job.minDegree) || 0,
+        tenureWeight: TENURE_WEIGHT,
+        degreeWeight: DEGREE_WEIGHT,
+        limit,
+      });
+
+    return rows.map((row) => ({
+      id: row.resume_id,
+      filename: row.filename,
+      storedName: row.stored_name,
+      batchId: row.batch_id,
+      name: row.name,
+      email: row.email,
+      score: Math.round(row.score * 1000) / 1000,
+      skillScore: Math.round(row.skill_score * 1000) / 1000,
+      matchedSkills: row.matched.split("|"),
+      tenureYears: row.tenure_years,
+      degreeLevel: row.degree_level,
+    }));
+  }
+
+  // Failed parse attempts recorded for a document hash (0 when none)
+  function failureCount(sha256) {
+    const row = getFailures.get(sha256);
+    return row ? row.failures : 0;
+  }
+
+  // Count a timeout/crash/memory failure; returns the new failure count
+  function recordFailure(sha256, filename, error) {
+    upsertFailure.run(sha256, filename, JSON.stringify(error), Date.now());
+    return failureCount(sha256);
+  }
+
+  function clearFailures(sha256) {
+    deleteFailures.run(sha256);
+  }
+
+  // Delete uploaded PDFs older than the cutoff and drop their references
+  function purgeUploads(uploadDir, maxAgeMs) {
+    const cutoff = Date.now() - maxAgeMs;
+    let removed = 0;
+    for (const file of fs.readdirSync(uploadDir)) {
+      const filePath = path.join(uploadDir, file);
+      try {
+        const stat = fs.statSync(filePath);
+        if (stat.isFile() && stat.mtimeMs < cutoff) {
+          fs.unlinkSync(filePath);
+          removed++;
+        }
+      } catch (err) {
+        console.error("⚠️ Failed to purge upload:", file, err.message);
+      }
+    }
+    expireUploads.run(cutoff);
+    return removed;
+  }
+
+  return {
+    db,
+    saveResult,
+    findDuplicate,
+    mergeIntoBatch,
+    queryResults,
+    matchResumes,
+    purgeUploads,
+    failureCount,
+    recordFailure,
+    clearFailures,
+  };
+}
+
+module.exports = createResultStore;
@@ -0,0 +1,33 @@
+// FIFO work queue that runs at most `concurrency` tasks at a time
+function createWorkQueue(concurrency) {
+  const pending = [];
+  let active = 0;
+
+  const next = () => {
+    while (active < concurrency && pending.length) {
+      const { task, resolve, reject } = pending.shift();
+      active++;
+      Promise.resolve()
+        .then(task)
+        .then(resolve, reject)
+        .finally(() => {
+          active--;
+          next();
+        });
+    }
+  };
+
+  return {
+    run(task) {
+      return new Promise((resolve, reject) => {
+        pending.push({ task, resolve, reject });
+        next();
+      });
+    },
+    get size() {
+      return active + pending.length;
+    },
+  };
+}
+
+module.exports = createWorkQueue;